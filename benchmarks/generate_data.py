@@ -0,0 +1,118 @@
+import argparse
+import ast
+import csv
+import json
+import random
+
+from mock_github import DEFAULTS, build_readme, build_repo
+
+# data.json 每个分组的仓库数
+GROUP_SIZE = 1000
+# 数据集中 README 的默认中位数大小（字节），比抓取时小一些，方便生成大数据集
+README_MEDIAN = 1024
+
+
+def repo_names(count, seed=0):
+    """生成 count 个不重复的 owner/name，owner 数量约为仓库数的五分之一"""
+    rnd = random.Random(seed)
+    owners = max(1, count // 5)
+    for i in range(count):
+        yield f"owner{rnd.randrange(owners)}/repo-{i}"
+
+
+def iter_records(count, readme_median=README_MEDIAN, malformed_rate=0.001, seed=0):
+    """按 data.json 的字段生成仓库记录；topics 与真实数据一样是 Python 列表的字符串形式"""
+    config = {**DEFAULTS, "readme_median": readme_median, "seed": seed}
+    rnd = random.Random(seed)
+    for i, repo_name in enumerate(repo_names(count, seed)):
+        repo = build_repo(config, repo_name)
+        topics = str(repo["topics"])
+        if rnd.random() < malformed_rate:
+            topics = topics[:-1]
+        yield {
+            "repo_id": str(i + 1),
+            "b.repo_name": repo_name,
+            "total_openrank": round(rnd.paretovariate(1.2), 2),
+            "a.description": repo["description"] or "",
+            "a.readme_text": build_readme(config, repo_name) if rnd.random() > DEFAULTS["no_readme_rate"] else "",
+            "a.topics": topics,
+        }
+
+
+def write_data_json(path, records):
+    """写成 {"分组": [仓库, ...], ...} 格式，逐条写出，不在内存中保留全部记录"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for record in records:
+            if count % GROUP_SIZE == 0:
+                f.write("]," if count else "")
+                f.write(f'"group{count // GROUP_SIZE}": [')
+            else:
+                f.write(", ")
+            f.write(json.dumps(record, ensure_ascii=False))
+            count += 1
+        f.write("]}" if count else "}")
+    return count
+
+
+def _topic_list(topics):
+    # 爬虫输出里的 topics 是列表；格式错误的样本保持原字符串
+    try:
+        return ast.literal_eval(topics)
+    except (SyntaxError, ValueError):
+        return topics
+
+
+def write_jsonl(path, records):
+    """写成爬虫输出（repos_output.jsonl）的格式"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps({
+                "repo_id": record["repo_id"],
+                "repo_name": record["b.repo_name"],
+                "total_openrank": record["total_openrank"],
+                "description": record["a.description"],
+                "homepage_url": None,
+                "topics": _topic_list(record["a.topics"]),
+                "readme_text": record["a.readme_text"],
+                "success": True,
+                "fail_reason": None
+            }, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def write_csv(path, count, seed=0):
+    """生成爬虫输入，格式与 2025-openrank-top10000.csv 相同"""
+    rnd = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["repo_id", "repo_name", "total_openrank"])
+        for i, repo_name in enumerate(repo_names(count, seed)):
+            writer.writerow([i + 1, repo_name, round(rnd.paretovariate(1.2) * 100)])
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成压测用的合成数据")
+    parser.add_argument("kind", choices=["json", "jsonl", "csv"],
+                        help="json: data.json 分组格式；jsonl: 爬虫输出格式；csv: 爬虫输入")
+    parser.add_argument("count", type=int, help="仓库数量")
+    parser.add_argument("output", help="输出文件")
+    parser.add_argument("--readme-median", type=int, default=README_MEDIAN)
+    parser.add_argument("--malformed-rate", type=float, default=0.001, help="topics 字段格式错误的比例")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.kind == "csv":
+        count = write_csv(args.output, args.count, args.seed)
+    else:
+        records = iter_records(args.count, args.readme_median, args.malformed_rate, args.seed)
+        count = (write_data_json if args.kind == "json" else write_jsonl)(args.output, records)
+    print(f"✅ 已生成 {count} 个仓库: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote
+
+# 默认配置，可以用命令行参数覆盖
+DEFAULTS = {
+    "port": 8765,
+    # 每个请求的平均延迟（秒）和抖动比例
+    "latency": 0.05,
+    "jitter": 0.5,
+    # 每个 token 每个窗口的额度，与 GitHub 的 REST 接口一致
+    "rate_limit": 5000,
+    "window": 3600,
+    # 按请求随机注入的错误比例：403 二级限流、429、5xx
+    "forbidden_rate": 0.0,
+    "throttle_rate": 0.0,
+    "server_error_rate": 0.0,
+    # 按仓库名固定的 404 和没有 README 的比例，重试也不会变
+    "not_found_rate": 0.0,
+    "no_readme_rate": 0.05,
+    # README 大小服从对数正态分布，中位数约 readme_median 字节
+    "readme_median": 4096,
+    "readme_sigma": 1.0,
+    "readme_max": 512 * 1024,
+    # 对 If-None-Match 返回 304，且 304 不消耗额度
+    "etag": True,
+    "seed": 0,
+}
+
+TOPIC_VOCAB = [f"topic-{i}" for i in range(2000)]
+# 热门 topic 出现得多，大致符合真实数据的长尾分布
+TOPIC_WEIGHTS = [1 / (i + 1) for i in range(len(TOPIC_VOCAB))]
+WORDS = ("the a data fast simple library framework tool api server client build run test "
+         "model open source python rust go web cloud native database stream query cache").split()
+GRAPHQL_REPO = re.compile(r'(r\d+): repository\(owner: ("(?:[^"\\]|\\.)*"), name: ("(?:[^"\\]|\\.)*")\)')
+
+
+def _repo_random(config, repo_name, salt=""):
+    digest = hashlib.blake2b(f"{config['seed']}:{salt}:{repo_name}".encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, "big"))
+
+
+def _repo_fraction(config, repo_name, salt):
+    """按仓库名固定的 [0, 1) 随机数，同一个仓库每次请求结果相同"""
+    return _repo_random(config, repo_name, salt).random()
+
+
+def _sentence(rnd, n):
+    return " ".join(rnd.choice(WORDS) for _ in range(n))
+
+
+def build_readme(config, repo_name):
+    """生成带标题、徽章、代码块和表格的 markdown，大小按配置的分布抽样"""
+    rnd = _repo_random(config, repo_name, "readme")
+    size = min(config["readme_max"], int(rnd.lognormvariate(0, config["readme_sigma"]) * config["readme_median"]))
+    parts = [
+        f"# {repo_name}\n",
+        f"[![build](https://img.shields.io/badge/build-passing-green)](https://github.com/{repo_name}/actions)\n",
+    ]
+    length = sum(len(p) for p in parts)
+    while length < size:
+        kind = rnd.random()
+        if kind < 0.6:
+            part = _sentence(rnd, rnd.randint(20, 80)) + ".\n\n"
+        elif kind < 0.75:
+            part = f"## {_sentence(rnd, 3)}\n\n"
+        elif kind < 0.9:
+            part = "```python\n" + "\n".join(f"x{i} = {i}" for i in range(rnd.randint(3, 15))) + "\n```\n\n"
+        else:
+            part = "| a | b |\n|---|---|\n" + "".join(f"| {_sentence(rnd, 2)} | {i} |\n" for i in range(5)) + "\n"
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:max(size, 1)]
+
+
+def build_repo(config, repo_name):
+    rnd = _repo_random(config, repo_name, "repo")
+    topics = sorted(set(rnd.choices(TOPIC_VOCAB, TOPIC_WEIGHTS, k=rnd.randint(0, 8))))
+    return {
+        "full_name": repo_name,
+        "description": _sentence(rnd, rnd.randint(3, 20)) if rnd.random() > 0.1 else None,
+        "homepage": f"https://{repo_name.replace('/', '.')}.example.com" if rnd.random() > 0.7 else None,
+        "topics": topics,
+    }
+
+
+class MockState:
+    """额度和请求计数，所有处理线程共享"""
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._budgets = {}
+        self._random = random.Random(config["seed"])
+        self.counts = {}
+
+    def count(self, key):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def roll(self):
+        with self._lock:
+            return self._random.random()
+
+    def consume(self, token, cost=1):
+        """扣除 token 的额度，返回 (额度是否足够, 响应头)"""
+        now = time.time()
+        with self._lock:
+            remaining, reset = self._budgets.get(token, (self.config["rate_limit"], now + self.config["window"]))
+            if now >= reset:
+                remaining, reset = self.config["rate_limit"], now + self.config["window"]
+            allowed = remaining >= cost
+            if allowed:
+                remaining -= cost
+            self._budgets[token] = (remaining, reset)
+        return allowed, {
+            "X-RateLimit-Limit": str(self.config["rate_limit"]),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(int(reset)),
+            "X-RateLimit-Used": str(self.config["rate_limit"] - remaining),
+        }
+
+
+class MockGitHubHandler(BaseHTTPRequestHandler):
+    """模拟 GitHub 的 /repos/{owner}/{name}、/repos/{owner}/{name}/readme 和 /graphql"""
+
+    protocol_version = "HTTP/1.1"
+    # 默认不缓冲，响应头会被拆成多个小包
+    wbufsize = 64 * 1024
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        if body:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_json(self, status, data, headers=None):
+        self._send(status, json.dumps(data).encode("utf-8"), headers)
+
+    def _delay(self):
+        config = self.state.config
+        if config["latency"] > 0:
+            spread = config["latency"] * config["jitter"]
+            time.sleep(max(0.0, config["latency"] + random.uniform(-spread, spread)))
+
+    def _inject_error(self, endpoint, headers):
+        """按配置的比例随机返回 403 / 429 / 502，返回 True 表示已经响应"""
+        config = self.state.config
+        roll = self.state.roll()
+        if roll < config["forbidden_rate"]:
+            self.state.count(f"{endpoint}_403")
+            self._send_json(403, {"message": "You have exceeded a secondary rate limit."}, {**headers, "Retry-After": "1"})
+            return True
+        roll -= config["forbidden_rate"]
+        if roll < config["throttle_rate"]:
+            self.state.count(f"{endpoint}_429")
+            self._send_json(429, {"message": "Too Many Requests"}, {**headers, "Retry-After": "1"})
+            return True
+        roll -= config["throttle_rate"]
+        if roll < config["server_error_rate"]:
+            self.state.count(f"{endpoint}_502")
+            self._send_json(502, {"message": "Server Error"}, headers)
+            return True
+        return False
+
+    def _token(self):
+        return self.headers.get("Authorization", "")
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            self._send_json(200, self.state.counts)
+            return
+
+        path = unquote(self.path.split("?", 1)[0]).strip("/").split("/")
+        if len(path) not in (3, 4) or path[0] != "repos" or (len(path) == 4 and path[3] != "readme"):
+            self._send_json(404, {"message": "Not Found"})
+            return
+        repo_name = f"{path[1]}/{path[2]}"
+        endpoint = "readme" if len(path) == 4 else "repo"
+        config = self.state.config
+        self._delay()
+
+        if endpoint == "repo":
+            data = build_repo(config, repo_name)
+        else:
+            text = build_readme(config, repo_name)
+            data = {
+                "name": "README.md",
+                "encoding": "base64",
+                "content": base64.encodebytes(text.encode("utf-8")).decode("ascii"),
+            }
+        body = json.dumps(data).encode("utf-8")
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if config["etag"] and self.headers.get("If-None-Match") == etag:
+            # 与 GitHub 一样，带认证的 304 不计入额度
+            _, headers = self.state.consume(self._token(), cost=0)
+            self.state.count(f"{endpoint}_304")
+            self._send(304, headers={**headers, "ETag": etag})
+            return
+
+        allowed, headers = self.state.consume(self._token())
+        if not allowed:
+            self.state.count(f"{endpoint}_rate_limited")
+            self._send_json(403, {"message": "API rate limit exceeded"}, headers)
+            return
+        if self._inject_error(endpoint, headers):
+            return
+        missing = _repo_fraction(config, repo_name, "missing") < config["not_found_rate"]
+        if missing or (endpoint == "readme" and _repo_fraction(config, repo_name, "no_readme") < config["no_readme_rate"]):
+            self.state.count(f"{endpoint}_404")
+            self._send_json(404, {"message": "Not Found"}, headers)
+            return
+        self.state.count(f"{endpoint}_200")
+        self._send(200, body, {**headers, "ETag": etag})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.rstrip("/") != "/graphql":
+            self._send_json(404, {"message": "Not Found"})
+            return
+        config = self.state.config
+        self._delay()
+        allowed, headers = self.state.consume(self._token())
+        if not allowed:
+            self.state.count("graphql_rate_limited")
+            self._send_json(200, {"errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]}, headers)
+            return
+        if self._inject_error("graphql", headers):
+            return
+
+        data = {}
+        errors = []
+        for alias, owner, name in GRAPHQL_REPO.findall(json.loads(body)["query"]):
+            repo_name = f"{json.loads(owner)}/{json.loads(name)}"
+            if _repo_fraction(config, repo_name, "missing") < config["not_found_rate"]:
+                data[alias] = None
+                errors.append({"type": "NOT_FOUND", "path": [alias], "message": f"Could not resolve to a Repository '{repo_name}'."})
+                continue
+            repo = build_repo(config, repo_name)
+            node = {
+                "description": repo["description"],
+                "homepageUrl": repo["homepage"],
+                "repositoryTopics": {"nodes": [{"topic": {"name": topic}} for topic in repo["topics"]]},
+            }
+            for i in range(7):
+                node[f"readme{i}"] = None
+            if _repo_fraction(config, repo_name, "no_readme") >= config["no_readme_rate"]:
+                node["readme0"] = {"text": build_readme(config, repo_name)}
+            data[alias] = node
+        self.state.count("graphql_200")
+        self._send_json(200, {"data": data, "errors": errors} if errors else {"data": data}, headers)
+
+
+def start_server(port=0, **overrides):
+    """在后台线程启动模拟服务器，返回 (server, base_url)；port=0 时自动选择空闲端口"""
+    config = {**DEFAULTS, **overrides, "port": port}
+    handler = type("Handler", (MockGitHubHandler,), {"state": MockState(config)})
+    # 默认的 listen 队列只有 5，几十个并发连接会被拒绝或等待 SYN 重传
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-github", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的 GitHub API，用于压测爬虫")
+    for key, value in DEFAULTS.items():
+        option = "--" + key.replace("_", "-")
+        if isinstance(value, bool):
+            parser.add_argument(option, type=lambda s: s.lower() in ("1", "true", "yes"), default=value)
+        else:
+            parser.add_argument(option, type=type(value), default=value)
+    args = vars(parser.parse_args())
+    server, base_url = start_server(**args)
+    print(f"🚀 模拟 GitHub API 已启动: {base_url}（GITHUB_API_BASE={base_url}）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
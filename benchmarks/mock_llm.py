@@ -0,0 +1,141 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 默认配置，可以用命令行参数覆盖
+DEFAULTS = {
+    "port": 8766,
+    # 每个请求的固定延迟，加上每个输出 token 的生成时间（秒）
+    "latency": 0.3,
+    "token_latency": 0.002,
+    # 随机注入的 429 和 500 比例
+    "throttle_rate": 0.0,
+    "server_error_rate": 0.0,
+    # 每个仓库返回的 topic 数
+    "topics": 5,
+    "seed": 0,
+}
+
+STOPWORDS = set("""a an and are as at be by for from has have in is it its of on or that the this to was
+were will with you your repo description topics readme use using used can also more""".split())
+_REPO_BLOCK = re.compile(r"^### (\d+)\n(.*?)(?=^### \d+\n|\Z)", re.M | re.S)
+_WORD = re.compile(r"[a-z][a-z0-9+#.-]{2,}")
+
+
+def estimate_tokens(text):
+    return int(len(text.split()) * 1.3) + 1
+
+
+def fake_topics(text, n):
+    """取仓库内容里最常见的词当作 topic，同样的输入总是得到同样的结果"""
+    words = Counter(w.strip(".-") for w in _WORD.findall(text.lower()) if w not in STOPWORDS)
+    return [word for word, _ in words.most_common(n)]
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """模拟 OpenAI 兼容的 /v1/chat/completions，按提示词里的 "### id" 分块逐个仓库返回 topics"""
+
+    protocol_version = "HTTP/1.1"
+    wbufsize = 64 * 1024
+    config = None
+    counts = None
+    lock = None
+    rng = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, key, value=1):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + value
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            with self.lock:
+                self._send_json(200, dict(self.counts))
+        else:
+            self._send_json(404, {"error": {"message": "Not Found"}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not Found"}})
+            return
+        config = self.config
+        with self.lock:
+            roll = self.rng.random()
+        if roll < config["throttle_rate"]:
+            self._count("429")
+            self._send_json(429, {"error": {"message": "Rate limit reached"}}, {"Retry-After": "1"})
+            return
+        if roll < config["throttle_rate"] + config["server_error_rate"]:
+            self._count("500")
+            self._send_json(500, {"error": {"message": "Internal error"}})
+            return
+
+        request = json.loads(body)
+        messages = request.get("messages") or []
+        prompt = "\n".join(m.get("content") or "" for m in messages)
+        user = messages[-1].get("content") or "" if messages else ""
+        results = [{"id": int(i), "topics": fake_topics(text, config["topics"])} for i, text in _REPO_BLOCK.findall(user)]
+        content = json.dumps({"results": results})
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(content) + 4 * len(results)}
+        time.sleep(config["latency"] + usage["completion_tokens"] * config["token_latency"])
+
+        self._count("200")
+        self._count("repos", len(results))
+        self._count("prompt_tokens", usage["prompt_tokens"])
+        self._count("completion_tokens", usage["completion_tokens"])
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{time.time_ns()}",
+            "object": "chat.completion",
+            "model": request.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {**usage, "total_tokens": usage["prompt_tokens"] + usage["completion_tokens"]}
+        })
+
+
+def start_server(port=0, **overrides):
+    """在后台线程启动模拟服务器，返回 (server, base_url)；port=0 时自动选择空闲端口"""
+    config = {**DEFAULTS, **overrides, "port": port}
+    handler = type("Handler", (MockLLMHandler,), {
+        "config": config, "counts": {}, "lock": threading.Lock(), "rng": random.Random(config["seed"])
+    })
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-llm", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的 LLM 接口（OpenAI 兼容），用于测试打标签流程")
+    for key, value in DEFAULTS.items():
+        parser.add_argument("--" + key.replace("_", "-"), type=type(value), default=value)
+    args = vars(parser.parse_args())
+    server, base_url = start_server(**args)
+    print(f"🚀 模拟 LLM 接口已启动: {base_url}（LLM_API_BASE={base_url}）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
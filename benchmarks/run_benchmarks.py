@@ -0,0 +1,280 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import generate_data
+from mock_github import start_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(ROOT, "dataset")
+DATA_DIR = os.path.join(ROOT, "data")
+# 每次运行的结果追加到这里，用来和之前的运行比较
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+# 比同样参数的上一次结果慢（或内存多）超过这个比例记为退化
+REGRESSION_THRESHOLD = 0.15
+
+# 爬虫按原样运行，有配置时通过 main(config) 覆盖脚本顶部的常量；输入文件放在临时工作目录下，文件名与脚本里的 CSV_FILE 一致
+CRAWLERS = {
+    "sequential": ("dataset_script.py", {}),
+    "threaded": ("dataset_script_mulio.py", {}),
+    "retry-rest": ("dataset_script_mulio_fail_retry.py", {}),
+    "retry-graphql": ("dataset_script_mulio_fail_retry.py", {"FETCH_BACKEND": "graphql"}),
+    "retry-adaptive": ("dataset_script_mulio_fail_retry.py", {"ADAPTIVE_CONCURRENCY": True}),
+    "async": ("dataset_script_async.py", {}),
+}
+
+# 统计引擎在子进程里运行，{data} 是 data.json，{jsonl} 是同样内容的爬虫输出格式
+ANALYZERS = {
+    "analyze": "import data; data.analyze_dataset(data.iter_data({data!r}))",
+    "analyze-parallel": "import data; data.analyze_dataset_parallel({data!r}, workers=2)",
+    "analyze-approximate": "import data; data.analyze_dataset(data.iter_data({data!r}), approximate=True)",
+    "vectorized": "import data, vectorized_stats as v; v.compute_stats(v.build_table(data.iter_data({data!r})))",
+    "incremental": "import incremental_stats as i; s = i.IncrementalStats('state.sqlite'); s.sync({jsonl!r}); s.stats(); s.close()",
+    "topic-index": "import data, topic_index as t; t.build_index(data.iter_data({data!r}), 'index.sqlite')",
+}
+
+# 在子进程里执行爬虫脚本：没有配置时按 __main__ 运行，否则导入后调用 main(config)
+DRIVER = """
+import importlib, json, os, runpy, sys
+path, config = sys.argv[1], json.loads(sys.argv[2])
+sys.path.insert(0, os.path.dirname(path))
+sys.argv = [path]
+if config:
+    importlib.import_module(os.path.splitext(os.path.basename(path))[0]).main(config)
+else:
+    runpy.run_path(path, run_name="__main__")
+"""
+
+
+def run_process(args, cwd, env=None, timeout=None):
+    """运行子进程，返回耗时、CPU 时间、峰值内存（包括它已回收的子进程）和退出码"""
+    with open(os.path.join(cwd, "output.log"), "wb") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(args, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        deadline = start + timeout if timeout else None
+        while True:
+            pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                break
+            if deadline and time.perf_counter() > deadline:
+                process.kill()
+                pid, status, usage = os.wait4(process.pid, 0)
+                status = None
+                break
+            time.sleep(0.01)
+        wall = time.perf_counter() - start
+    # 已经用 wait4 回收，告诉 Popen 不要再等
+    process.returncode = os.waitstatus_to_exitcode(status) if status is not None else -9
+    return {
+        "wall": wall,
+        "cpu": usage.ru_utime + usage.ru_stime,
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "exit_code": process.returncode,
+        "timed_out": status is None,
+    }
+
+
+def log_tail(cwd, lines=20):
+    with open(os.path.join(cwd, "output.log"), encoding="utf-8", errors="replace") as f:
+        return "".join(f.readlines()[-lines:])
+
+
+def count_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def mock_counts(base_url):
+    with urllib.request.urlopen(f"{base_url}/_stats") as r:
+        return json.load(r)
+
+
+def bench_crawler(name, csv_file, repos, base_url, timeout):
+    script, overrides = CRAWLERS[name]
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+        with open(csv_file, "rb") as src, open(os.path.join(workdir, "2025-openrank-top10000.csv"), "wb") as dst:
+            dst.write(src.read())
+        env = {**os.environ, "GITHUB_API_BASE": base_url, "GITHUB_GRAPHQL_URL": f"{base_url}/graphql"}
+        before = mock_counts(base_url)
+        result = run_process(
+            [sys.executable, "-c", DRIVER, os.path.join(DATASET_DIR, script), json.dumps(overrides)],
+            workdir, env, timeout
+        )
+        after = mock_counts(base_url)
+        result["items"] = count_lines(os.path.join(workdir, "repos_output.jsonl"))
+        result["requests"] = {key: after[key] - before.get(key, 0) for key in after if after[key] != before.get(key, 0)}
+        if result["exit_code"] != 0:
+            result["log"] = log_tail(workdir)
+    result["throughput"] = result["items"] / result["wall"] if result["wall"] else 0.0
+    result["expected_items"] = repos
+    return result
+
+
+def bench_analyzer(name, data_file, jsonl_file, records, timeout):
+    code = "import sys; sys.path.insert(0, %r); " % DATA_DIR + ANALYZERS[name].format(data=data_file, jsonl=jsonl_file)
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+        result = run_process([sys.executable, "-c", code], workdir, timeout=timeout)
+        if result["exit_code"] != 0:
+            result["log"] = log_tail(workdir)
+    result["items"] = records if result["exit_code"] == 0 else 0
+    result["throughput"] = result["items"] / result["wall"] if result["wall"] else 0.0
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_baseline(history, entry):
+    """参数完全相同的最近一次成功结果"""
+    for previous in reversed(history):
+        if previous["name"] == entry["name"] and previous["params"] == entry["params"] and previous["exit_code"] == 0:
+            return previous
+    return None
+
+
+def regressions(entry, baseline, threshold):
+    found = []
+    if entry["wall"] > baseline["wall"] * (1 + threshold):
+        found.append(f"耗时 {baseline['wall']:.2f}s → {entry['wall']:.2f}s")
+    if entry["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + threshold):
+        found.append(f"峰值内存 {baseline['peak_rss_mb']:.0f}MB → {entry['peak_rss_mb']:.0f}MB")
+    if entry["items"] < baseline["items"]:
+        found.append(f"完成数 {baseline['items']} → {entry['items']}")
+    return found
+
+
+def summarize(runs):
+    """重复运行时取耗时的中位数那一次，峰值内存取最大值"""
+    runs = sorted(runs, key=lambda r: r["wall"])
+    result = dict(runs[len(runs) // 2])
+    result["peak_rss_mb"] = max(r["peak_rss_mb"] for r in runs)
+    if len(runs) > 1:
+        result["wall_stdev"] = statistics.stdev(r["wall"] for r in runs)
+    return result
+
+
+def print_table(entries):
+    print(f"\n{'benchmark':<22}{'items':>8}{'wall(s)':>10}{'cpu(s)':>9}{'items/s':>10}{'peak(MB)':>10}  状态")
+    for entry in entries:
+        status = "✅" if entry["exit_code"] == 0 else ("⏱️ 超时" if entry["timed_out"] else f"❌ 退出码 {entry['exit_code']}")
+        if entry.get("regressions"):
+            status += " ⚠️ 退化: " + "，".join(entry["regressions"])
+        elif entry.get("baseline") is None and entry["exit_code"] == 0:
+            status += " （无基线）"
+        print(f"{entry['name']:<22}{entry['items']:>8}{entry['wall']:>10.2f}{entry['cpu']:>9.2f}"
+              f"{entry['throughput']:>10.1f}{entry['peak_rss_mb']:>10.0f}  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="爬虫和统计引擎的压测，结果与上一次同参数的运行比较")
+    parser.add_argument("--suite", choices=["crawl", "analyze", "all"], default="all")
+    parser.add_argument("--only", help="只运行这些项目，逗号分隔，例如 retry-rest,vectorized")
+    parser.add_argument("--repos", type=int, default=300, help="爬虫压测的仓库数")
+    parser.add_argument("--records", type=int, default=50000, help="统计压测的仓库数")
+    parser.add_argument("--repeat", type=int, default=1, help="每项重复次数，取耗时的中位数")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--latency", type=float, default=0.05, help="模拟服务器的平均响应延迟（秒）")
+    parser.add_argument("--rate-limit", type=int, default=10 ** 7, help="模拟服务器每个 token 每小时的额度")
+    parser.add_argument("--forbidden-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--not-found-rate", type=float, default=0.01)
+    parser.add_argument("--readme-median", type=int, default=4096)
+    parser.add_argument("--mock-url", help="使用已经启动的模拟服务器（mock_github.py），不在本进程启动")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--no-save", action="store_true", help="不把本次结果写入历史")
+    parser.add_argument("--fail-on-regression", action="store_true", help="有退化时以退出码 1 结束")
+    args = parser.parse_args()
+
+    only = set(args.only.split(",")) if args.only else None
+    unknown = (only or set()) - set(CRAWLERS) - set(ANALYZERS)
+    if unknown:
+        parser.error(f"未知的项目: {', '.join(sorted(unknown))}")
+    crawlers = [name for name in CRAWLERS if args.suite in ("crawl", "all") and (only is None or name in only)]
+    analyzers = [name for name in ANALYZERS if args.suite in ("analyze", "all") and (only is None or name in only)]
+
+    history = load_history(args.results)
+    revision = git_revision()
+    entries = []
+
+    def record(name, params, runs):
+        entry = {"name": name, "params": params, "revision": revision, "timestamp": time.time(), **summarize(runs)}
+        baseline = find_baseline(history, entry)
+        entry["baseline"] = baseline["revision"] if baseline else None
+        entry["regressions"] = regressions(entry, baseline, args.threshold) if baseline and entry["exit_code"] == 0 else []
+        entries.append(entry)
+        if entry["exit_code"] != 0:
+            print(f"❌ {name} 失败，输出末尾:\n{entry.get('log', '')}")
+
+    with tempfile.TemporaryDirectory(prefix="bench-data-") as data_dir:
+        if crawlers:
+            server = None
+            if args.mock_url:
+                base_url = args.mock_url.rstrip("/")
+            else:
+                server, base_url = start_server(
+                    latency=args.latency, rate_limit=args.rate_limit, forbidden_rate=args.forbidden_rate,
+                    throttle_rate=args.throttle_rate, server_error_rate=args.server_error_rate,
+                    not_found_rate=args.not_found_rate, readme_median=args.readme_median
+                )
+            csv_file = os.path.join(data_dir, "repos.csv")
+            generate_data.write_csv(csv_file, args.repos)
+            params = {
+                "repos": args.repos, "latency": args.latency, "rate_limit": args.rate_limit,
+                "forbidden_rate": args.forbidden_rate, "throttle_rate": args.throttle_rate,
+                "server_error_rate": args.server_error_rate, "not_found_rate": args.not_found_rate,
+                "readme_median": args.readme_median, "mock": "external" if args.mock_url else "inline",
+            }
+            for name in crawlers:
+                print(f"🕷️ {name} ...")
+                runs = [bench_crawler(name, csv_file, args.repos, base_url, args.timeout) for _ in range(args.repeat)]
+                record(name, params, runs)
+            if server is not None:
+                server.shutdown()
+
+        if analyzers:
+            print(f"🧪 生成 {args.records} 个仓库的合成数据 ...")
+            data_file = os.path.join(data_dir, "data.json")
+            jsonl_file = os.path.join(data_dir, "repos_output.jsonl")
+            generate_data.write_data_json(data_file, generate_data.iter_records(args.records))
+            generate_data.write_jsonl(jsonl_file, generate_data.iter_records(args.records))
+            params = {"records": args.records, "readme_median": generate_data.README_MEDIAN}
+            for name in analyzers:
+                print(f"📊 {name} ...")
+                runs = [bench_analyzer(name, data_file, jsonl_file, args.records, args.timeout) for _ in range(args.repeat)]
+                record(name, params, runs)
+
+    print_table(entries)
+    if not args.no_save:
+        with open(args.results, "a", encoding="utf-8") as f:
+            for entry in entries:
+                entry.pop("log", None)
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"\n💾 结果已追加到 {args.results}")
+    if args.fail_on_regression and any(entry["regressions"] for entry in entries):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
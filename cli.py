@@ -0,0 +1,208 @@
+import argparse
+import ast
+import importlib
+import json
+import os
+import sys
+import time
+
+# 只在顶层导入标准库里的轻量模块：requests、tqdm、aiohttp、线程池和进程池都由各子命令在运行时才导入，
+# stats 和 progress 这类小任务的启动时间不受爬虫依赖影响
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(ROOT, "dataset")
+DATA_DIR = os.path.join(ROOT, "data")
+
+CRAWLERS = {
+    "retry": "dataset_script_mulio_fail_retry",
+    "async": "dataset_script_async",
+}
+# 只有 retry 引擎支持的参数
+RETRY_ENGINE_OPTIONS = ("backend", "adaptive", "metrics_port")
+# 统计断点文件行数时每次读取的字节数
+COUNT_CHUNK_SIZE = 1 << 20
+
+
+def script_constants(path):
+    """读取脚本顶层的字面量常量（不执行脚本，也不导入它的依赖）"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                constants[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+    return constants
+
+
+def crawler_config(args):
+    """命令行参数 -> 爬虫的配置（模块顶部的常量名）；没有指定的参数保留脚本里的默认值"""
+    config = {}
+    tokens = args.token or [token for token in os.environ.get("GITHUB_TOKENS", "").split(",") if token]
+    if not tokens and os.environ.get("GITHUB_TOKEN"):
+        tokens = [os.environ["GITHUB_TOKEN"]]
+    if tokens:
+        config["GITHUB_TOKEN"] = tokens[0]
+        config["GITHUB_TOKENS"] = tokens
+    if args.output:
+        config["OUTPUT_FILE"] = args.output
+    if args.workers:
+        config["CONCURRENCY" if args.engine == "async" else "MAX_WORKERS"] = args.workers
+    if args.min_interval is not None:
+        config["MIN_INTERVAL"] = args.min_interval
+    if args.backend:
+        config["FETCH_BACKEND"] = args.backend
+    if args.adaptive:
+        config["ADAPTIVE_CONCURRENCY"] = True
+    if args.columnar_dir:
+        config["COLUMNAR_OUTPUT_DIR"] = args.columnar_dir
+    if args.metrics_port:
+        config["METRICS_PORT"] = args.metrics_port
+    return config
+
+
+def _absolute(path):
+    return os.path.abspath(path) if path else path
+
+
+def cmd_crawl(args):
+    config = crawler_config(args)
+    if args.command == "retry":
+        # 不读 CSV，只重新抓取上一轮失败的仓库
+        config["CSV_FILE"] = None
+    elif args.csv:
+        config["CSV_FILE"] = args.csv
+    sys.path.insert(0, DATASET_DIR)
+    crawler = importlib.import_module(CRAWLERS[args.engine])
+    # 输出文件都相对于工作目录，与在 dataset 目录下直接运行脚本时一致
+    os.chdir(args.dir)
+    crawler.main(config)
+
+
+def cmd_stats(args):
+    sys.path.insert(0, DATA_DIR)
+    import data
+    data.main(args.file, limit=None if args.all else args.limit, workers=args.workers,
+              approximate=args.approximate, canonical=args.canonical, output_file=args.output)
+
+
+def count_lines(path):
+    """文件中的换行符个数；只按字节计数，不解析内容，正在写入的半行不计入"""
+    if not path or not os.path.exists(path):
+        return 0
+    count = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(COUNT_CHUNK_SIZE)
+            if not chunk:
+                return count
+            count += chunk.count(b"\n")
+
+
+def crawl_progress(directory, engine="retry"):
+    """根据断点文件和指标快照汇总抓取进度，不打开爬虫使用的 sqlite，也不导入爬虫脚本"""
+    constants = script_constants(os.path.join(DATASET_DIR, CRAWLERS[engine] + ".py"))
+
+    def path(name):
+        value = constants.get(name)
+        return os.path.join(directory, value) if value else None
+
+    csv_file = path("CSV_FILE")
+    total = max(count_lines(csv_file) - 1, 0) if csv_file and os.path.exists(csv_file) else None
+    progress = {
+        "total": total,
+        "succeeded": count_lines(path("SUCCESS_FILE")),
+        "failed": count_lines(path("FAILED_FILE")),
+        "permanent_failed": count_lines(path("PERMANENT_FILE")),
+        # 运行中上一轮的失败列表被移到 PREV_FAILED_FILE，运行结束后删除
+        "running": bool(path("PREV_FAILED_FILE") and os.path.exists(path("PREV_FAILED_FILE"))),
+    }
+    if total is not None:
+        progress["remaining"] = max(total - progress["succeeded"] - progress["permanent_failed"], 0)
+    metrics_file = path("METRICS_FILE")
+    if metrics_file and os.path.exists(metrics_file):
+        with open(metrics_file, encoding="utf-8") as f:
+            progress["metrics"] = json.load(f)
+    return progress
+
+
+def cmd_progress(args):
+    progress = crawl_progress(args.dir, args.engine)
+    if args.json:
+        print(json.dumps(progress, ensure_ascii=False))
+        return
+    total = progress["total"]
+    done = progress["succeeded"]
+    state = "运行中" if progress["running"] else "未运行"
+    if total:
+        print(f"📊 抓取进度（{state}）: {done:,} / {total:,} ({done / total * 100:.1f}%)，剩余 {progress['remaining']:,}")
+    else:
+        print(f"📊 抓取进度（{state}）: 已完成 {done:,}")
+    print(f"  本轮失败: {progress['failed']:,}，永久失败: {progress['permanent_failed']:,}")
+    metrics = progress.get("metrics")
+    if metrics:
+        age = time.time() - metrics["timestamp"]
+        print(f"  指标快照（{age:.0f}s 前）: 请求 {metrics['requests_total']:,} 次，"
+              f"最近 {metrics['recent_requests_per_sec']:.1f} 次/s")
+        for endpoint, info in sorted(metrics.get("endpoints", {}).items()):
+            print(f"    {endpoint:<8} p50 {info['p50'] * 1000:.0f}ms  p95 {info['p95'] * 1000:.0f}ms  状态码 {info['status']}")
+        failed = metrics.get("counters", {}).get("failed_total")
+        if failed:
+            print(f"    失败原因: {failed}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="open-scope 的统一入口：抓取、重试、统计和查看进度")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("crawl", "抓取 CSV 中还没有成功的仓库（包括上一轮失败的）"),
+                            ("retry", "只重新抓取上一轮失败的仓库")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--engine", choices=sorted(CRAWLERS), default="retry",
+                         help="retry: 线程池爬虫（dataset_script_mulio_fail_retry.py），async: 异步爬虫")
+        if name == "crawl":
+            sub.add_argument("--csv", type=_absolute, help="仓库列表（默认为脚本里的 CSV_FILE）")
+        sub.add_argument("--output", type=_absolute, help="输出文件（默认为脚本里的 OUTPUT_FILE）")
+        sub.add_argument("--token", action="append",
+                         help="GitHub token，可重复指定多个；默认读取环境变量 GITHUB_TOKENS（逗号分隔）或 GITHUB_TOKEN")
+        sub.add_argument("--workers", type=int, help="线程数（async 为并发请求数）")
+        sub.add_argument("--min-interval", type=float, help="retry: 每个 worker 处理完一个仓库后休眠的秒数；async: 每个 token 两次请求的最小间隔")
+        sub.add_argument("--backend", choices=["rest", "graphql"], help="仅 retry 引擎")
+        sub.add_argument("--adaptive", action="store_true", help="自适应并发，仅 retry 引擎")
+        sub.add_argument("--columnar-dir", type=_absolute, help="同时写出 Parquet 的目录")
+        sub.add_argument("--metrics-port", type=int, help="在这个端口提供 /metrics，仅 retry 引擎")
+        sub.add_argument("--dir", type=_absolute, default=DATASET_DIR, help="工作目录，断点和输出文件都在这里")
+        sub.set_defaults(func=cmd_crawl)
+
+    sub = subparsers.add_parser("stats", help="统计数据集（data/data.py）")
+    sub.add_argument("file", nargs="?", default=os.path.join(DATA_DIR, "data.json"),
+                     help="data.json 或爬虫输出的 .jsonl")
+    sub.add_argument("--limit", type=int, default=3000, help="只统计前 N 个仓库")
+    sub.add_argument("--all", action="store_true", help="统计全部仓库")
+    sub.add_argument("--workers", type=int, default=1, help="大于 1 时多进程统计")
+    sub.add_argument("--approximate", action="store_true", help="用 TopicSketch 近似统计 topics")
+    sub.add_argument("--canonical", action="store_true", help="合并 topic 的写法变体和同义词")
+    sub.add_argument("--output", help="统计结果文件（默认 data_statistics_top<N>.json）")
+    sub.set_defaults(func=cmd_stats)
+
+    sub = subparsers.add_parser("progress", help="查看抓取进度")
+    sub.add_argument("--engine", choices=sorted(CRAWLERS), default="retry")
+    sub.add_argument("--dir", default=DATASET_DIR, help="爬虫的工作目录")
+    sub.add_argument("--json", action="store_true", help="输出一行 JSON，便于定时任务采集")
+    sub.set_defaults(func=cmd_progress)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.func is cmd_crawl and args.engine != "retry":
+        given = [name for name in RETRY_ENGINE_OPTIONS if getattr(args, name)]
+        if given:
+            parser.error(f"--engine {args.engine} 不支持: {', '.join('--' + name.replace('_', '-') for name in given)}")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,151 @@
 import json
 import ast
+import os
+from collections import Counter, deque
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from collections import Counter
-from typing import Set, List, Dict, Any
+from typing import FrozenSet, List, Dict, Any, Iterator, Iterable, Optional, TextIO
+
+# 流式解析时每次读取的字符数
+READ_CHUNK_SIZE = 1 << 20
+
+# 爬虫输出（repos_output.jsonl）字段到 data.json 字段的映射
+CRAWLER_FIELDS = {
+    'description': 'a.description',
+    'readme_text': 'a.readme_text',
+    'topics': 'a.topics',
+    'repo_name': 'b.repo_name',
+}
+
+# 统计用到的字段
+ANALYSIS_FIELDS = ('a.description', 'a.readme_text', 'a.topics', 'b.repo_name')
+
+# 多进程统计时每个分片的仓库数量，ANALYSIS_WORKERS大于1时main使用多进程统计
+SHARD_SIZE = 20000
+ANALYSIS_WORKERS = 1
+
+# 为True时main用sketches.TopicSketch近似统计topics（不重复数和热门topics），内存固定且可跨分片合并
+APPROXIMATE_TOPICS = False
+
+# 为True时统计前把topics规范化并合并同义词（topic_aliases），如 'ML'、'machinelearning' 都计为 'machine-learning'
+CANONICAL_TOPICS = False
+
+# 缓存解析过的topics字符串；解析失败的值只计数并保留少量样本，不逐条打印
+TOPICS_CACHE_SIZE = 1 << 16
+MALFORMED_SAMPLE_SIZE = 5
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _JsonStream:
+    """在分块读入的文本上逐个解码 JSON 值，缓冲区只保留尚未消费的部分"""
+
+    def __init__(self, f: TextIO, chunk_size: int = READ_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（文件结束时返回空串）"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"JSON格式错误: 期望 {chars!r}，实际为 {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                # 值恰好结束在缓冲区末尾时可能被截断（例如数字），多读一块再确认
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def _iter_grouped_json(f: TextIO) -> Iterator[Dict]:
+    """逐个产出 {"分组": [仓库, ...], ...} 格式中的仓库，不把整个文件读入内存"""
+    stream = _JsonStream(f)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        stream.value()
+        stream.expect(':')
+        stream.expect('[')
+        if stream.peek() == ']':
+            stream.pos += 1
+        else:
+            while True:
+                yield stream.value()
+                if stream.expect(',]') == ']':
+                    break
+        if stream.expect(',}') == '}':
+            return
+
+
+def _normalize_crawler_record(record: Dict) -> Dict:
+    """把爬虫输出的字段名转换成 data.json 的格式"""
+    for source, target in CRAWLER_FIELDS.items():
+        if source in record and target not in record:
+            record[target] = record.pop(source)
+    return record
+
+def _iter_jsonl(f: TextIO) -> Iterator[Dict]:
+    """逐行读取爬虫输出"""
+    for line in f:
+        if line.strip():
+            yield _normalize_crawler_record(json.loads(line))
+
+
+def iter_data(file_path: str = "data/data.json", limit: int = None) -> Iterator[Dict]:
+    """流式读取数据文件，逐个产出仓库记录；指定limit时读够即停止解析
+
+    支持 data.json 的分组格式和爬虫输出的 JSONL 格式（按扩展名区分）。
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        if file_path.endswith('.jsonl'):
+            records = _iter_jsonl(f)
+        else:
+            records = _iter_grouped_json(f)
+        yield from islice(records, limit)
+
 
 def load_data(file_path: str = "data/data.json", limit: int = None) -> List[Dict]:
     """加载数据文件，可限制加载的仓库数量"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 提取仓库数据（处理特殊的JSON格式）
-        repositories = []
-        for key in data:
-            repositories.extend(data[key])
+        repositories = list(iter_data(file_path, limit))
         
-        # 如果指定了限制数量，则截取前limit个
         if limit is not None:
-            repositories = repositories[:limit]
             print(f"成功加载数据文件: {file_path}，已限制为前 {limit} 个仓库")
         else:
             print(f"成功加载数据文件: {file_path}，共 {len(repositories)} 个仓库")
@@ -27,123 +155,298 @@ def load_data(file_path: str = "data/data.json", limit: int = None) -> List[Dict
         print(f"加载数据文件时出错: {str(e)}")
         return []
 
-def parse_topics(topics_str: str) -> Set[str]:
-    """解析topics字符串为集合"""
-    if not topics_str or topics_str == '':
-        return set()
+def _split_simple_list(topics_str: str) -> Optional[List[str]]:
+    """快速解析只包含简单字符串的列表字面量，如 ['a', 'b']；不确定时返回None交给完整解析"""
+    inner = topics_str[1:-1].strip()
+    if not inner:
+        return []
+    items = []
+    for part in inner.split(','):
+        part = part.strip()
+        if len(part) < 2 or part[0] not in '\'"' or part[-1] != part[0]:
+            return None
+        item = part[1:-1]
+        if part[0] in item or '\\' in item:
+            return None
+        items.append(item)
+    return items
+
+@lru_cache(maxsize=TOPICS_CACHE_SIZE)
+def _decode_topics(topics_str: str) -> Optional[FrozenSet[str]]:
+    """解析topics字符串，解析失败返回None；相同的字符串只解析一次"""
+    stripped = topics_str.strip()
+    if stripped.startswith('[') and stripped.endswith(']'):
+        # 先走JSON和简单列表的快速路径
+        if stripped.startswith('["') or stripped == '[]':
+            try:
+                topics = json.loads(stripped)
+                if all(isinstance(topic, str) for topic in topics):
+                    return frozenset(topics)
+            except ValueError:
+                pass
+        topics = _split_simple_list(stripped)
+        if topics is not None:
+            return frozenset(topics)
     
     try:
         # 使用ast.literal_eval安全解析Python字面量
         topics = ast.literal_eval(topics_str)
-        if isinstance(topics, set):
-            return topics
-        elif isinstance(topics, list):
-            return set(topics)
+        if isinstance(topics, (set, list)):
+            return frozenset(topics)
         else:
-            return {str(topics)}
-    except (SyntaxError, ValueError):
-        # 如果解析失败，返回空集合
-        print(f"解析topics失败: {topics_str}")
-        return set()
+            return frozenset({str(topics)})
+    except (SyntaxError, ValueError, TypeError):
+        return None
 
-def analyze_dataset(repositories: List[Dict]) -> Dict[str, Any]:
-    """分析数据集的基本信息"""
-    stats = {
+def parse_topics(topics_str: str, canonical: bool = False) -> FrozenSet[str]:
+    """解析topics字符串为不可变集合（结果有缓存，不能原地修改），解析失败返回空集合
+
+    canonical=True 时返回规范化并合并同义词后的topics，结果按topics集合缓存。
+    """
+    if not topics_str or topics_str == '':
+        return frozenset()
+    
+    # 爬虫输出中的topics已经是列表
+    if isinstance(topics_str, (list, tuple, set)):
+        topics = frozenset(topics_str)
+    else:
+        topics = _decode_topics(topics_str)
+        if topics is None:
+            return frozenset()
+    if canonical:
+        from topic_aliases import canonicalize
+        topics = canonicalize(topics)
+    return topics
+
+def new_partial(approximate: bool = False) -> Dict[str, Any]:
+    """创建空的部分统计结果，各分片的部分结果可以用merge_partials合并
+
+    approximate=True 时不保留完整的topic_frequency，改用固定内存的TopicSketch。
+    """
+    partial = {
         'total_repositories': 0,
         'repositories_with_topics': 0,
         'repositories_without_topics': 0,
         'total_topic_occurrences': 0,
-        'unique_topics': set(),
         'topic_frequency': Counter(),
         'repositories_with_description': 0,
         'repositories_with_readme': 0,
         'repositories_with_both_desc_readme': 0,
         'empty_descriptions': 0,
         'empty_readmes': 0,
-        'avg_topics_per_repo': 0,
         'max_topics_per_repo': 0,
         'min_topics_per_repo': float('inf'),
         'repos_by_topic_count': Counter(),
-        'top_topics': [],
-        'sample_repositories': []
+        'sample_repositories': [],
+        'malformed_topics_count': 0,
+        'malformed_topics_samples': []
     }
+    if approximate:
+        from sketches import TopicSketch
+        del partial['topic_frequency']
+        partial['topic_sketch'] = TopicSketch()
+    return partial
+
+def update_partial(partial: Dict[str, Any], repo: Dict, canonical: bool = False) -> None:
+    """把一个仓库计入部分统计结果，canonical=True 时按规范化后的topics统计"""
+    partial['total_repositories'] += 1
     
-    all_topics = []
-    topics_per_repo = []
+    # 基本信息统计
+    description = repo.get('a.description') or ''
+    # 使用README库的爬虫输出只有readme_sha256，有哈希就说明有非空README
+    readme = repo.get('a.readme_text') or repo.get('readme_sha256') or ''
+    topics_str = repo.get('a.topics', '')
+    repo_name = repo.get('b.repo_name', 'Unknown')
     
-    for repo in repositories:
-        stats['total_repositories'] += 1
+    # 描述和README统计
+    has_description = bool(description and description.strip())
+    has_readme = bool(readme and readme.strip())
+    if has_description:
+        partial['repositories_with_description'] += 1
+    else:
+        partial['empty_descriptions'] += 1
         
-        # 基本信息统计
-        description = repo.get('a.description', '')
-        readme = repo.get('a.readme_text', '')
-        topics_str = repo.get('a.topics', '')
-        repo_name = repo.get('b.repo_name', 'Unknown')
+    if has_readme:
+        partial['repositories_with_readme'] += 1
+    else:
+        partial['empty_readmes'] += 1
         
-        # 描述和README统计
-        if description and description.strip():
-            stats['repositories_with_description'] += 1
-        else:
-            stats['empty_descriptions'] += 1
-            
-        if readme and readme.strip():
-            stats['repositories_with_readme'] += 1
-        else:
-            stats['empty_readmes'] += 1
-            
-        if (description and description.strip()) and (readme and readme.strip()):
-            stats['repositories_with_both_desc_readme'] += 1
+    if has_description and has_readme:
+        partial['repositories_with_both_desc_readme'] += 1
+    
+    # Topics统计
+    topics = parse_topics(topics_str, canonical)
+    if not topics and isinstance(topics_str, str) and topics_str and _decode_topics(topics_str) is None:
+        partial['malformed_topics_count'] += 1
+        if len(partial['malformed_topics_samples']) < MALFORMED_SAMPLE_SIZE:
+            partial['malformed_topics_samples'].append(topics_str)
+    
+    if topics:
+        partial['repositories_with_topics'] += 1
+        topic_count = len(topics)
+        partial['repos_by_topic_count'][topic_count] += 1
         
-        # Topics统计
-        topics = parse_topics(topics_str)
+        # 更新最大最小topics数量
+        partial['max_topics_per_repo'] = max(partial['max_topics_per_repo'], topic_count)
+        partial['min_topics_per_repo'] = min(partial['min_topics_per_repo'], topic_count)
         
-        if topics:
-            stats['repositories_with_topics'] += 1
-            topic_count = len(topics)
-            topics_per_repo.append(topic_count)
-            stats['repos_by_topic_count'][topic_count] += 1
-            
-            # 更新最大最小topics数量
-            stats['max_topics_per_repo'] = max(stats['max_topics_per_repo'], topic_count)
-            stats['min_topics_per_repo'] = min(stats['min_topics_per_repo'], topic_count)
-            
-            # 收集所有topics
-            all_topics.extend(topics)
-            stats['unique_topics'].update(topics)
-            
-            # 更新topic频率
-            for topic in topics:
-                stats['topic_frequency'][topic] += 1
+        # 更新topic频率（topic_frequency的键就是不重复topic集合）
+        partial['total_topic_occurrences'] += topic_count
+        if 'topic_sketch' in partial:
+            partial['topic_sketch'].update(topics)
         else:
-            stats['repositories_without_topics'] += 1
-        
-        # 收集样本仓库信息（前10个）
-        if len(stats['sample_repositories']) < 10:
-            stats['sample_repositories'].append({
-                'repo_name': repo_name,
-                'description': description[:100] + '...' if len(description) > 100 else description,
-                'topics_count': len(topics),
-                'topics': list(topics)[:5]  # 只显示前5个topics
-            })
-    
-    # 计算统计指标
-    stats['total_topic_occurrences'] = len(all_topics)
+            partial['topic_frequency'].update(topics)
+    else:
+        partial['repositories_without_topics'] += 1
+    
+    # 收集样本仓库信息（前10个）
+    if len(partial['sample_repositories']) < 10:
+        partial['sample_repositories'].append({
+            'repo_name': repo_name,
+            'description': description[:100] + '...' if len(description) > 100 else description,
+            'topics_count': len(topics),
+            'topics': list(topics)[:5]  # 只显示前5个topics
+        })
+
+def merge_partials(partial: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    """把other合并进partial并返回partial；按数据顺序合并时结果与串行统计完全一致"""
+    for key, value in other.items():
+        if key == 'max_topics_per_repo':
+            partial[key] = max(partial[key], value)
+        elif key == 'min_topics_per_repo':
+            partial[key] = min(partial[key], value)
+        elif key == 'sample_repositories':
+            partial[key].extend(value[:10 - len(partial[key])])
+        elif key == 'malformed_topics_samples':
+            partial[key].extend(value[:MALFORMED_SAMPLE_SIZE - len(partial[key])])
+        elif key == 'topic_sketch':
+            partial[key].merge(value)
+        elif isinstance(value, Counter):
+            partial[key].update(value)
+        else:
+            partial[key] += value
+    return partial
+
+def finalize_stats(partial: Dict[str, Any]) -> Dict[str, Any]:
+    """由部分统计结果计算最终的统计指标"""
+    sketch = partial.get('topic_sketch')
+    if sketch is not None:
+        # 近似模式下topic_frequency只包含热门topic候选及其估计次数
+        topic_frequency = Counter(dict(sketch.most_common(sketch.capacity)))
+    else:
+        topic_frequency = partial['topic_frequency']
+    stats = {
+        'total_repositories': partial['total_repositories'],
+        'repositories_with_topics': partial['repositories_with_topics'],
+        'repositories_without_topics': partial['repositories_without_topics'],
+        'total_topic_occurrences': partial['total_topic_occurrences'],
+        # 转换为列表以便JSON序列化
+        'unique_topics': list(topic_frequency),
+        'topic_frequency': topic_frequency,
+        'repositories_with_description': partial['repositories_with_description'],
+        'repositories_with_readme': partial['repositories_with_readme'],
+        'repositories_with_both_desc_readme': partial['repositories_with_both_desc_readme'],
+        'empty_descriptions': partial['empty_descriptions'],
+        'empty_readmes': partial['empty_readmes'],
+        'avg_topics_per_repo': 0,
+        'max_topics_per_repo': partial['max_topics_per_repo'],
+        'min_topics_per_repo': partial['min_topics_per_repo'],
+        'repos_by_topic_count': partial['repos_by_topic_count'],
+        # 获取最热门的topics
+        'top_topics': topic_frequency.most_common(30),
+        'sample_repositories': partial['sample_repositories'],
+        'malformed_topics_count': partial['malformed_topics_count'],
+        'malformed_topics_samples': partial['malformed_topics_samples']
+    }
     stats['unique_topics_count'] = len(stats['unique_topics'])
+    if sketch is not None:
+        stats['unique_topics_count'] = sketch.unique_count()
+        stats['approximate'] = True
     
     if stats['repositories_with_topics'] > 0:
-        stats['avg_topics_per_repo'] = sum(topics_per_repo) / len(topics_per_repo)
+        stats['avg_topics_per_repo'] = stats['total_topic_occurrences'] / stats['repositories_with_topics']
     
     if stats['min_topics_per_repo'] == float('inf'):
         stats['min_topics_per_repo'] = 0
     
-    # 获取最热门的topics
-    stats['top_topics'] = stats['topic_frequency'].most_common(30)
-    
-    # 转换unique_topics为列表以便JSON序列化
-    stats['unique_topics'] = list(stats['unique_topics'])
-    
     return stats
 
+def analyze_dataset(repositories: Iterable[Dict], approximate: bool = False,
+                    canonical: bool = False) -> Dict[str, Any]:
+    """分析数据集的基本信息"""
+    partial = new_partial(approximate)
+    for repo in repositories:
+        update_partial(partial, repo, canonical)
+    return finalize_stats(partial)
+
+def _analyze_shard(repositories: List[Dict], approximate: bool = False,
+                   canonical: bool = False) -> Dict[str, Any]:
+    partial = new_partial(approximate)
+    for repo in repositories:
+        update_partial(partial, repo, canonical)
+    return partial
+
+def _analyze_jsonl_range(file_path: str, start: int, end: int, approximate: bool = False,
+                         canonical: bool = False) -> Dict[str, Any]:
+    """统计JSONL文件中起始位置落在[start, end)内的行，由工作进程自己读取和解析"""
+    partial = new_partial(approximate)
+    with open(file_path, 'rb') as f:
+        if start > 0:
+            # 跳过属于上一个分片的半行
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                update_partial(partial, _normalize_crawler_record(json.loads(line)), canonical)
+    return partial
+
+def _iter_shards(records: Iterable[Dict], shard_size: int) -> Iterator[List[Dict]]:
+    records = iter(records)
+    while True:
+        # 只传统计用到的字段，减少进程间序列化的数据量
+        shard = [{key: repo[key] for key in ANALYSIS_FIELDS if key in repo}
+                 for repo in islice(records, shard_size)]
+        if not shard:
+            return
+        yield shard
+
+def analyze_dataset_parallel(file_path: str, limit: int = None, workers: int = None,
+                             shard_size: int = SHARD_SIZE, approximate: bool = False,
+                             canonical: bool = False) -> Dict[str, Any]:
+    """多进程分片统计，结果与analyze_dataset(iter_data(file_path, limit))完全相同
+
+    不限制数量的JSONL文件按字节范围切分，由各工作进程自己解析；
+    其他情况由主进程流式解析，每shard_size个仓库交给一个工作进程。
+    分片结果按数据顺序合并，同时在途的分片数有上限，内存占用不随数据量增长。
+    approximate=True 时各分片用TopicSketch统计topics，结果是近似值；
+    canonical=True 时各工作进程各自加载一次同义词表并按规范化后的topics统计。
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or os.cpu_count() or 1
+    partial = new_partial(approximate)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if file_path.endswith('.jsonl') and limit is None:
+            size = os.path.getsize(file_path)
+            step = max(size // (workers * 4), 1 << 20)
+            tasks = (executor.submit(_analyze_jsonl_range, file_path, start, min(start + step, size),
+                                     approximate, canonical)
+                     for start in range(0, size, step))
+        else:
+            tasks = (executor.submit(_analyze_shard, shard, approximate, canonical)
+                     for shard in _iter_shards(iter_data(file_path, limit), shard_size))
+        
+        pending = deque()
+        for future in tasks:
+            pending.append(future)
+            if len(pending) >= workers * 2:
+                merge_partials(partial, pending.popleft().result())
+        while pending:
+            merge_partials(partial, pending.popleft().result())
+    return finalize_stats(partial)
+
 def print_statistics(stats: Dict[str, Any], limit: int = None):
     """打印统计结果"""
     limit_info = f"（前 {limit} 个仓库）" if limit is not None else ""
@@ -157,12 +460,15 @@ def print_statistics(stats: Dict[str, Any], limit: int = None):
     print(f"  包含topics的仓库: {stats['repositories_with_topics']:,} ({stats['repositories_with_topics']/stats['total_repositories']*100:.1f}%)")
     print(f"  不包含topics的仓库: {stats['repositories_without_topics']:,} ({stats['repositories_without_topics']/stats['total_repositories']*100:.1f}%)")
     
+    approximate_info = "（近似值）" if stats.get('approximate') else ""
     print(f"\n🏷️ Topics统计:")
     print(f"  Topic标签总出现次数: {stats['total_topic_occurrences']:,}")
-    print(f"  不重复topic标签总数: {stats['unique_topics_count']:,}")
+    print(f"  不重复topic标签总数{approximate_info}: {stats['unique_topics_count']:,}")
     print(f"  平均每个仓库的topics数量: {stats['avg_topics_per_repo']:.2f}")
     print(f"  单个仓库最多topics数量: {stats['max_topics_per_repo']}")
     print(f"  单个仓库最少topics数量: {stats['min_topics_per_repo']}")
+    if stats.get('malformed_topics_count'):
+        print(f"  解析失败的topics: {stats['malformed_topics_count']:,} 个，例如: {stats['malformed_topics_samples'][:3]}")
     
     print(f"\n📝 内容统计:")
     print(f"  包含描述的仓库: {stats['repositories_with_description']:,} ({stats['repositories_with_description']/stats['total_repositories']*100:.1f}%)")
@@ -171,7 +477,7 @@ def print_statistics(stats: Dict[str, Any], limit: int = None):
     print(f"  空描述的仓库: {stats['empty_descriptions']:,}")
     print(f"  空README的仓库: {stats['empty_readmes']:,}")
     
-    print(f"\n🔥 最热门的30个Topics:")
+    print(f"\n🔥 最热门的30个Topics{approximate_info}:")
     for i, (topic, count) in enumerate(stats['top_topics'], 1):
         percentage = count / stats['repositories_with_topics'] * 100
         print(f"  {i:2d}. {topic:<25} {count:4d} 次 ({percentage:5.1f}%)")
@@ -206,31 +512,44 @@ def save_statistics(stats: Dict[str, Any], output_file: str = "data_statistics.j
     except Exception as e:
         print(f"保存统计结果时出错: {str(e)}")
 
-def main():
-    """主函数"""
+def main(data_file: str = "data/data.json", limit: Optional[int] = 3000, workers: int = ANALYSIS_WORKERS,
+         approximate: bool = APPROXIMATE_TOPICS, canonical: bool = CANONICAL_TOPICS,
+         output_file: Optional[str] = None):
+    """主函数，默认统计data/data.json的前3000个仓库；cli.py stats 通过参数覆盖这些配置"""
     print("开始分析GitHub仓库数据集...")
     
     # 检查数据文件是否存在
-    data_file = "data/data.json"
     if not Path(data_file).exists():
         print(f"错误: 数据文件 '{data_file}' 不存在")
         return
     
-    # 加载前3000个仓库的数据
-    repositories = load_data(data_file, limit=3000)
-    if not repositories:
+    # 流式读取前limit个仓库的数据，边解析边统计，不在内存中保留完整记录
+    print("正在分析数据...")
+    try:
+        if workers > 1:
+            stats = analyze_dataset_parallel(data_file, limit=limit, workers=workers,
+                                             approximate=approximate, canonical=canonical)
+        else:
+            stats = analyze_dataset(iter_data(data_file, limit=limit), approximate=approximate,
+                                    canonical=canonical)
+    except Exception as e:
+        print(f"加载数据文件时出错: {str(e)}")
+        return
+    if stats['total_repositories'] == 0:
         print("没有加载到有效数据")
         return
-    
-    # 分析数据
-    print("正在分析数据...")
-    stats = analyze_dataset(repositories)
+    if limit is not None:
+        print(f"成功加载数据文件: {data_file}，已限制为前 {limit} 个仓库")
+    else:
+        print(f"成功加载数据文件: {data_file}，共 {stats['total_repositories']} 个仓库")
     
     # 打印统计结果
-    print_statistics(stats, limit=3000)
+    print_statistics(stats, limit=limit)
     
     # 保存统计结果
-    save_statistics(stats, "data_statistics_top3000.json")
+    if output_file is None:
+        output_file = f"data_statistics_top{limit}.json" if limit is not None else "data_statistics.json"
+    save_statistics(stats, output_file)
     
     print("\n✅ 数据分析完成!")
 
@@ -0,0 +1,242 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from typing import Dict, Any, Optional
+
+from data import (new_partial, update_partial, finalize_stats, _normalize_crawler_record,
+                  print_statistics, save_statistics, MALFORMED_SAMPLE_SIZE)
+
+# 默认的爬虫输出和状态文件（从仓库根目录运行）
+OUTPUT_FILE = "dataset/repos_output.jsonl"
+STATE_FILE = "data/incremental_stats.sqlite"
+# 每处理这么多条新记录提交一次事务
+COMMIT_EVERY = 10000
+
+# 可以直接相加减的计数字段
+_COUNT_FIELDS = (
+    'total_repositories', 'repositories_with_topics', 'repositories_without_topics',
+    'total_topic_occurrences', 'repositories_with_description', 'repositories_with_readme',
+    'repositories_with_both_desc_readme', 'empty_descriptions', 'empty_readmes', 'malformed_topics_count'
+)
+
+
+def _contribution(record: Dict) -> Dict[str, Any]:
+    """一个仓库对统计结果的贡献，也就是只包含这一个仓库的部分统计结果"""
+    partial = new_partial()
+    update_partial(partial, record)
+    return partial
+
+
+def _summary(partial: Dict[str, Any]) -> list:
+    """把单仓库的贡献压缩成可以存进数据库、之后用来撤销的形式"""
+    malformed = partial['malformed_topics_samples']
+    return [
+        partial['repositories_with_description'],
+        partial['repositories_with_readme'],
+        list(partial['topic_frequency']),
+        malformed[0] if malformed else None,
+    ]
+
+
+class IncrementalStats:
+    """以 repo_id 为键的持久化统计状态
+
+    状态保存在 sqlite 中：repos 表记录每个仓库当前计入的贡献（有无描述/README、topics），
+    topics 表保存每个topic的出现次数，meta 表保存其余计数器和 repos_output.jsonl 已读到的字节偏移。
+    保存时topics表只写入上次保存后计数变化过的topic，不随不重复topic的总数增长。
+    sync() 只读取偏移之后新追加的记录；重新抓取的仓库先撤销旧贡献再计入新贡献，
+    所以同一个仓库在输出文件中出现多次也只统计最后一次。刷新统计的耗时只和新增记录数有关。
+
+    结果与按仓库第一次出现的顺序、每个仓库取最后一条记录做全量统计相同，样本也一样：
+    每个仓库记录第一次计入时的序号，样本仓库和解析失败的样本都按这个序号取前几个。
+    只有unique_topics的顺序、以及出现次数相同的topic在top_topics中的先后顺序可能不同。
+    """
+
+    def __init__(self, path: str = STATE_FILE):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS repos "
+                           "(repo_id TEXT PRIMARY KEY, summary TEXT, seq INTEGER, malformed INTEGER) WITHOUT ROWID")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS malformed_by_seq ON repos (seq) WHERE malformed")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS topics (topic TEXT PRIMARY KEY, count INTEGER) WITHOUT ROWID")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._load()
+
+    def _get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _load(self) -> None:
+        state = json.loads(self._get_meta('state', 'null') or 'null')
+        partial = new_partial()
+        # 前10个仓库的样本，仓库被重新抓取时原位替换，顺序不变
+        self.samples = []
+        self.next_seq = 0
+        if state:
+            for key in _COUNT_FIELDS:
+                partial[key] = state[key]
+            partial['repos_by_topic_count'] = Counter({int(k): v for k, v in state['repos_by_topic_count'].items()})
+            self.samples = state['samples']
+            self.next_seq = state['next_seq']
+        partial['topic_frequency'] = Counter(dict(self._conn.execute("SELECT topic, count FROM topics")))
+        # 上次保存后计数变化过的topic
+        self._dirty = set()
+        self.partial = partial
+        self.offset = int(self._get_meta('offset', 0))
+
+    def _save(self) -> None:
+        state = {key: self.partial[key] for key in _COUNT_FIELDS}
+        state['repos_by_topic_count'] = self.partial['repos_by_topic_count']
+        state['samples'] = self.samples
+        state['next_seq'] = self.next_seq
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('state', ?)", (json.dumps(state, ensure_ascii=False),))
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('offset', ?)", (str(self.offset),))
+        frequency = self.partial['topic_frequency']
+        self._conn.executemany("INSERT OR REPLACE INTO topics VALUES (?, ?)",
+                               [(topic, frequency[topic]) for topic in self._dirty if topic in frequency])
+        self._conn.executemany("DELETE FROM topics WHERE topic = ?",
+                               [(topic,) for topic in self._dirty if topic not in frequency])
+        self._conn.commit()
+        self._dirty.clear()
+
+    def reset(self) -> None:
+        self._conn.execute("DELETE FROM repos")
+        self._conn.execute("DELETE FROM topics")
+        self._conn.execute("DELETE FROM meta")
+        self._conn.commit()
+        self._load()
+
+    def _apply(self, summary: list, sign: int) -> None:
+        has_description, has_readme, topics, _ = summary
+        partial = self.partial
+        partial['total_repositories'] += sign
+        partial['repositories_with_description'] += sign * has_description
+        partial['empty_descriptions'] += sign * (1 - has_description)
+        partial['repositories_with_readme'] += sign * has_readme
+        partial['empty_readmes'] += sign * (1 - has_readme)
+        partial['repositories_with_both_desc_readme'] += sign * (has_description & has_readme)
+        partial['malformed_topics_count'] += sign * (summary[3] is not None)
+        if not topics:
+            partial['repositories_without_topics'] += sign
+            return
+        partial['repositories_with_topics'] += sign
+        partial['total_topic_occurrences'] += sign * len(topics)
+        frequency = partial['topic_frequency']
+        by_count = partial['repos_by_topic_count']
+        self._dirty.update(topics)
+        if sign > 0:
+            frequency.update(topics)
+            by_count[len(topics)] += 1
+            return
+        # 撤销时删除计数归零的键，topic_frequency的键仍然是不重复topic集合
+        for topic in topics:
+            frequency[topic] -= 1
+            if frequency[topic] <= 0:
+                del frequency[topic]
+        by_count[len(topics)] -= 1
+        if by_count[len(topics)] <= 0:
+            del by_count[len(topics)]
+
+    def add(self, record: Dict) -> None:
+        """计入一条爬虫记录；该仓库之前计入过的话先撤销旧的贡献"""
+        record = _normalize_crawler_record(record)
+        repo_id = str(record.get('repo_id') or record.get('b.repo_name'))
+        contribution = _contribution(record)
+        summary = _summary(contribution)
+
+        row = self._conn.execute("SELECT summary, seq FROM repos WHERE repo_id = ?", (repo_id,)).fetchone()
+        if row is not None:
+            self._apply(json.loads(row[0]), -1)
+            seq = row[1]
+        else:
+            seq = self.next_seq
+            self.next_seq += 1
+        self._apply(summary, 1)
+        self._conn.execute("INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?)",
+                           (repo_id, json.dumps(summary, ensure_ascii=False), seq, summary[3] is not None))
+
+        # 序号小于10的仓库就是全量统计时的前10个样本
+        if seq < 10:
+            sample = contribution['sample_repositories'][0]
+            if seq < len(self.samples):
+                self.samples[seq] = [repo_id, sample]
+            else:
+                self.samples.append([repo_id, sample])
+
+    def sync(self, output_file: str = OUTPUT_FILE) -> int:
+        """读取输出文件中新追加的记录，返回处理的记录数"""
+        size = os.path.getsize(output_file) if os.path.exists(output_file) else 0
+        if self.offset > size:
+            # 输出文件被截断或替换过，从头重建
+            self.reset()
+
+        count = 0
+        if size:
+            with open(output_file, "rb") as f:
+                f.seek(self.offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # 最后一行可能写了一半，留到下次再读
+                        break
+                    self.offset += len(line)
+                    if not line.strip():
+                        continue
+                    self.add(json.loads(line))
+                    count += 1
+                    if count % COMMIT_EVERY == 0:
+                        self._save()
+        self._save()
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        """当前状态对应的完整统计结果，结构与analyze_dataset相同"""
+        partial = dict(self.partial)
+        partial['topic_frequency'] = Counter(self.partial['topic_frequency'])
+        partial['repos_by_topic_count'] = Counter(self.partial['repos_by_topic_count'])
+        # 最大最小值在撤销后无法直接回退，改由直方图推出
+        counts = [k for k, v in partial['repos_by_topic_count'].items() if v > 0]
+        partial['max_topics_per_repo'] = max(counts, default=0)
+        partial['min_topics_per_repo'] = min(counts, default=float('inf'))
+        partial['sample_repositories'] = [sample for _, sample in self.samples]
+        # 解析失败的样本取当前仍然解析失败的仓库中序号最小的几个
+        rows = self._conn.execute("SELECT summary FROM repos WHERE malformed ORDER BY seq LIMIT ?",
+                                  (MALFORMED_SAMPLE_SIZE,))
+        partial['malformed_topics_samples'] = [json.loads(summary)[3] for summary, in rows]
+        return finalize_stats(partial)
+
+    def close(self) -> None:
+        self._save()
+        self._conn.close()
+
+
+def main():
+    """用法: python data/incremental_stats.py [repos_output.jsonl] [状态文件]"""
+    output_file = sys.argv[1] if len(sys.argv) > 1 else OUTPUT_FILE
+    state_file = sys.argv[2] if len(sys.argv) > 2 else STATE_FILE
+    if not os.path.exists(output_file):
+        print(f"错误: 数据文件 '{output_file}' 不存在")
+        return
+
+    start = time.time()
+    state = IncrementalStats(state_file)
+    try:
+        count = state.sync(output_file)
+        stats = state.stats()
+    finally:
+        state.close()
+    print(f"增量更新了 {count} 条记录，耗时 {time.time() - start:.2f}s")
+    if stats['total_repositories'] == 0:
+        print("没有加载到有效数据")
+        return
+
+    print_statistics(stats)
+    save_statistics(stats, "data_statistics_incremental.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import hashlib
+import math
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+# HyperLogLog 寄存器数量为 2**HLL_PRECISION，标准误差约 1.04 / sqrt(2**HLL_PRECISION)
+HLL_PRECISION = 14
+# Count-Min 的误差参数：估计值最多高估 CM_EPSILON * 总出现次数，失败概率不超过 CM_DELTA
+CM_EPSILON = 0.0005
+CM_DELTA = 0.001
+# 热门topic候选集合的大小，必须明显大于需要输出的top数量
+HEAVY_HITTERS = 1000
+
+
+@lru_cache(maxsize=1 << 16)
+def _hash64(item: str) -> int:
+    """与进程无关的64位哈希（内置hash()每个进程的种子不同，各分片的草图无法合并）"""
+    return int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """不重复元素个数的估计，内存固定为 2**precision 字节
+
+    precision=14 时标准误差约 0.81%；小基数时自动改用线性计数，结果接近精确值。
+    两个草图逐寄存器取最大值即可合并，合并结果与在全部数据上直接统计完全相同。
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add_hash(self, h: int) -> None:
+        rest_bits = 64 - self.precision
+        rest = h & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        index = h >> rest_bits
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, item: str) -> None:
+        self.add_hash(_hash64(item))
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog精度不同，无法合并")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    """出现次数的估计，只会高估不会低估
+
+    宽度 ceil(e / epsilon)、深度 ceil(ln(1 / delta))：以不低于 1 - delta 的概率，
+    估计值 <= 真实值 + epsilon * 总出现次数。同样参数的草图逐格相加即可合并。
+    """
+
+    def __init__(self, epsilon: float = CM_EPSILON, delta: float = CM_DELTA):
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1 / delta)))
+        self.table = array('q', bytes(8 * self.width * self.depth))
+        self.total = 0
+
+    def _cells(self, h: int) -> List[int]:
+        # 用两个32位哈希线性组合出depth个哈希函数（Kirsch-Mitzenmacher）
+        h1, h2 = h >> 32, (h & 0xFFFFFFFF) | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add_hash(self, h: int, count: int = 1) -> int:
+        """计入一次出现并返回更新后的估计值"""
+        table = self.table
+        estimate = None
+        for cell in self._cells(h):
+            table[cell] += count
+            if estimate is None or table[cell] < estimate:
+                estimate = table[cell]
+        self.total += count
+        return estimate
+
+    def estimate_hash(self, h: int) -> int:
+        return min(self.table[cell] for cell in self._cells(h))
+
+    def estimate(self, item: str) -> int:
+        return self.estimate_hash(_hash64(item))
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Count-Min参数不同，无法合并")
+        self.table = array('q', map(sum, zip(self.table, other.table)))
+        self.total += other.total
+        return self
+
+
+class TopicSketch:
+    """topic统计的近似版本：HyperLogLog估计不重复topic数，Count-Min加候选集合给出热门topics
+
+    候选集合最多保留 2 * capacity 个topic，超过时裁剪到估计次数最高的capacity个，
+    所以内存与数据量无关。出现次数明显高于总次数 1 / capacity 的topic会一直留在候选集合中，
+    热门topic的次数误差就是Count-Min的误差界。合并时草图直接合并，候选取并集后用合并后的
+    Count-Min重新估计再裁剪，可以在多进程分片之间按任意顺序合并。
+    """
+
+    def __init__(self, capacity: int = HEAVY_HITTERS):
+        self.capacity = capacity
+        self.distinct = HyperLogLog()
+        self.counts = CountMinSketch()
+        self.candidates: Dict[str, int] = {}
+        self._floor = 0
+
+    def update(self, topics: Iterable[str]) -> None:
+        candidates = self.candidates
+        for topic in topics:
+            h = _hash64(topic)
+            self.distinct.add_hash(h)
+            estimate = self.counts.add_hash(h)
+            if topic in candidates or estimate > self._floor:
+                candidates[topic] = estimate
+                if len(candidates) > 2 * self.capacity:
+                    self._prune()
+
+    def _prune(self) -> None:
+        kept = sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)[:self.capacity]
+        self.candidates.clear()
+        self.candidates.update(kept)
+        self._floor = kept[-1][1] if len(kept) >= self.capacity else 0
+
+    def merge(self, other: 'TopicSketch') -> 'TopicSketch':
+        self.distinct.merge(other.distinct)
+        self.counts.merge(other.counts)
+        topics = set(self.candidates) | set(other.candidates)
+        self.candidates = {topic: self.counts.estimate(topic) for topic in topics}
+        self._prune()
+        return self
+
+    def unique_count(self) -> int:
+        return self.distinct.count()
+
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        return sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)[:n]
@@ -0,0 +1,119 @@
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping
+
+# 额外的同义词表（与本文件同目录），格式与BUILTIN_ALIASES相同：{"规范topic": ["别名", ...]}
+ALIASES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topic_aliases.json")
+# 缓存规范化过的单个topic和整个topic集合
+CANONICAL_CACHE_SIZE = 1 << 18
+
+# 常见的缩写和写法变体；规范形式取GitHub上更常用的那个
+# 有歧义的缩写（ts、db、mac、win、node、py、es6、win32 等）不内置，需要时写进ALIASES_FILE
+BUILTIN_ALIASES: Dict[str, List[str]] = {
+    'machine-learning': ['ml', 'machinelearning', 'machine-learning-algorithms'],
+    'deep-learning': ['dl', 'deeplearning', 'deep-neural-networks'],
+    'artificial-intelligence': ['ai', 'artificialintelligence'],
+    'natural-language-processing': ['nlp', 'natural-language'],
+    'large-language-models': ['llm', 'llms', 'large-language-model'],
+    'reinforcement-learning': ['rl', 'reinforcementlearning'],
+    'computer-vision': ['computervision'],
+    'javascript': ['js', 'ecmascript'],
+    'python': ['python3', 'python-3'],
+    'nodejs': ['node-js'],
+    'react': ['reactjs', 'react-js'],
+    'vue': ['vuejs', 'vue-js'],
+    'golang': ['go-lang'],
+    'cpp': ['c++', 'cplusplus', 'cpp17', 'cpp20'],
+    'csharp': ['c#', 'c-sharp'],
+    'kubernetes': ['k8s', 'kube'],
+    'postgresql': ['postgres', 'postgre', 'psql'],
+    'database': ['databases'],
+    'cli': ['command-line', 'commandline', 'command-line-tool', 'cli-tool'],
+    'devops': ['dev-ops'],
+    'macos': ['osx', 'mac-os'],
+    'windows': ['windows-10'],
+}
+
+_SEPARATORS = re.compile(r"[\s_./]+")
+# 保留各种文字的字母和数字，中文、带重音的topic不会被清空
+_INVALID = re.compile(r"[^\w+#-]+")
+_HYPHENS = re.compile(r"-{2,}")
+
+
+def normalize_topic(topic: str) -> str:
+    """统一Unicode形式、大小写和分隔符：'Machine Learning'、'machine_learning' -> 'machine-learning'"""
+    topic = unicodedata.normalize('NFKC', topic).strip().casefold()
+    topic = _INVALID.sub('', _SEPARATORS.sub('-', topic))
+    return _HYPHENS.sub('-', topic).strip('-')
+
+
+def _compact(topic: str) -> str:
+    return topic.replace('-', '')
+
+
+def build_alias_table(aliases: Mapping[str, Iterable[str]]) -> Mapping[str, str]:
+    """别名 -> 规范topic 的只读哈希表
+
+    每个别名和规范topic本身都以原样、规范化后、去掉连字符三种形式登记，
+    'Machine Learning'、'machinelearning'、'ML' 都能一次查表找到 'machine-learning'。
+    同一个键出现多次时以先登记的为准。
+    """
+    table = {}
+    for canonical, names in aliases.items():
+        canonical = normalize_topic(canonical)
+        for name in (canonical, *names):
+            normalized = normalize_topic(name)
+            for key in (name.strip().lower(), normalized, _compact(normalized)):
+                if key:
+                    table.setdefault(key, canonical)
+    return MappingProxyType(table)
+
+
+class TopicCanonicalizer:
+    """topic规范化：先查别名表，查不到时规范化大小写和分隔符后再查，仍查不到就保留规范化后的形式
+
+    别名表在创建后不再修改，单个topic和整个topic集合的结果都有缓存，
+    相同的topic集合（多数仓库的topics在数据中大量重复）只计算一次。
+    """
+
+    def __init__(self, aliases: Mapping[str, Iterable[str]] = BUILTIN_ALIASES):
+        self.table = build_alias_table(aliases)
+        self.topic = lru_cache(maxsize=CANONICAL_CACHE_SIZE)(self._topic)
+        self.topics = lru_cache(maxsize=CANONICAL_CACHE_SIZE)(self._topics)
+
+    def _topic(self, topic: str) -> str:
+        table = self.table
+        found = table.get(topic)
+        if found is not None:
+            return found
+        normalized = normalize_topic(topic)
+        return table.get(normalized) or table.get(_compact(normalized)) or normalized
+
+    def _topics(self, topics: FrozenSet[str]) -> FrozenSet[str]:
+        canonical = self.topic
+        return frozenset(c for c in map(canonical, topics) if c)
+
+
+def load_aliases(path: str = ALIASES_FILE) -> Dict[str, List[str]]:
+    """内置同义词表加上path中的额外条目，path中的条目优先"""
+    aliases = {}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            aliases.update(json.load(f))
+    for canonical, names in BUILTIN_ALIASES.items():
+        aliases.setdefault(canonical, names)
+    return aliases
+
+
+@lru_cache(maxsize=None)
+def default_canonicalizer() -> TopicCanonicalizer:
+    """进程内只加载一次同义词表"""
+    return TopicCanonicalizer(load_aliases())
+
+
+def canonicalize(topics: FrozenSet[str]) -> FrozenSet[str]:
+    return default_canonicalizer().topics(topics)
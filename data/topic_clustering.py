@@ -0,0 +1,394 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from data import iter_data, parse_topics
+
+# 默认的数据文件和输出文件（从仓库根目录运行）
+DATA_FILE = "data/data.json"
+OUTPUT_FILE = "data/topic_clusters.json"
+CACHE_FILE = "data/embedding_cache.sqlite"
+ANN_INDEX_FILE = "data/topic_ann_index.npz"
+
+# 本地CPU上运行的句向量模型；没有安装sentence-transformers时退回字符n-gram哈希向量
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = 256
+HASHING_DIM = 256
+
+# 出现次数少于这个值的topic不参与聚类
+MIN_TOPIC_FREQUENCY = 2
+# 每个topic取前几个仓库的描述，与topic名的向量按DESCRIPTION_WEIGHT混合，区分同名不同义的topic
+DESCRIPTIONS_PER_TOPIC = 5
+DESCRIPTION_WEIGHT = 0.3
+
+# mini-batch k-means 的参数；聚类数默认取 sqrt(topic数 / 2)，上层类别数再取其平方根
+KMEANS_BATCH_SIZE = 1024
+KMEANS_ITERATIONS = 100
+# 近似最近邻每次查询探查的倒排列表数，以及每个topic保留的相关topic数
+ANN_NPROBE = 8
+RELATED_TOPICS = 10
+
+
+class HashingEmbedder:
+    """字符n-gram哈希向量：不依赖模型，只反映拼写上的相似（如 react / reactjs / react-native）"""
+
+    def __init__(self, dim: int = HASHING_DIM, n: int = 3):
+        self.dim = dim
+        self.n = n
+        self.name = f"hashing-{dim}-{n}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            padded = f" {text.lower()} "
+            for i in range(max(1, len(padded) - self.n + 1)):
+                h = zlib.crc32(padded[i:i + self.n].encode('utf-8'))
+                # 最高位决定符号，减少哈希冲突带来的偏差
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers 模型，只在CPU上运行"""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = EMBED_BATCH_SIZE):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.name = model_name
+        self.batch_size = batch_size
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                    convert_to_numpy=True, show_progress_bar=False)
+        return vectors.astype(np.float32)
+
+
+def load_embedder(model_name: str = EMBEDDING_MODEL):
+    """按需导入sentence-transformers；没有安装时使用HashingEmbedder"""
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        print("⚠️ 未安装 sentence-transformers，改用字符 n-gram 哈希向量（只能按拼写聚类）")
+        return HashingEmbedder()
+    return SentenceTransformerEmbedder(model_name)
+
+
+class EmbeddingCache:
+    """以 (模型名, 文本) 的哈希为键的向量缓存
+
+    向量以float32字节存进sqlite，换模型不会混用旧向量。重新运行时只有新出现的文本需要计算，
+    每算完一批就提交，中途中断也不会丢失已经算好的向量。
+    """
+
+    def __init__(self, path: str = CACHE_FILE):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB) WITHOUT ROWID")
+
+    @staticmethod
+    def _key(model_name: str, text: str) -> bytes:
+        return hashlib.blake2b(f"{model_name}\0{text}".encode('utf-8'), digest_size=16).digest()
+
+    def get_many(self, model_name: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        keys = {self._key(model_name, text): text for text in texts}
+        found = {}
+        key_list = list(keys)
+        for start in range(0, len(key_list), 500):
+            chunk = key_list[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for key, blob in rows:
+                found[keys[key]] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model_name: str, texts: List[str], vectors: np.ndarray) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+            ((self._key(model_name, text), vector.astype(np.float32).tobytes()) for text, vector in zip(texts, vectors))
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def embed_texts(texts: List[str], embedder, cache: Optional[EmbeddingCache] = None,
+                batch_size: int = EMBED_BATCH_SIZE) -> Tuple[np.ndarray, int]:
+    """返回与texts一一对应的单位向量和本次新计算的文本数；缓存里已有的文本不再计算"""
+    unique = list(dict.fromkeys(texts))
+    vectors = cache.get_many(embedder.name, unique) if cache is not None else {}
+    missing = [text for text in unique if text not in vectors]
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        embedded = embedder.embed(batch)
+        if cache is not None:
+            cache.put_many(embedder.name, batch, embedded)
+        vectors.update(zip(batch, embedded))
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32), 0
+    return np.stack([vectors[text] for text in texts]), len(missing)
+
+
+def _kmeans_plus_plus(X: np.ndarray, k: int, rng: np.random.Generator, sample_size: int = 20000) -> np.ndarray:
+    """在最多sample_size个样本上做k-means++初始化"""
+    if len(X) > sample_size:
+        X = X[rng.choice(len(X), sample_size, replace=False)]
+    centers = np.empty((k, X.shape[1]), dtype=np.float32)
+    centers[0] = X[rng.integers(len(X))]
+    # 单位向量之间的平方距离是 2 - 2cos
+    distance = np.maximum(2 - 2 * X @ centers[0], 0)
+    for i in range(1, k):
+        p = distance.astype(np.float64)
+        total = p.sum()
+        index = rng.choice(len(X), p=p / total) if total > 0 else rng.integers(len(X))
+        centers[i] = X[index]
+        distance = np.minimum(distance, np.maximum(2 - 2 * X @ centers[i], 0))
+    return centers
+
+
+def assign(X: np.ndarray, centers: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """每个向量所属的（余弦相似度最大的）中心，分块计算控制内存"""
+    labels = np.empty(len(X), dtype=np.int32)
+    for start in range(0, len(X), chunk_size):
+        labels[start:start + chunk_size] = np.argmax(X[start:start + chunk_size] @ centers.T, axis=1)
+    return labels
+
+
+def minibatch_kmeans(X: np.ndarray, k: int, batch_size: int = KMEANS_BATCH_SIZE,
+                     iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """单位向量上的mini-batch k-means（球面k-means），返回 (中心, 每个向量的类别)
+
+    每轮只用batch_size个样本更新中心，中心的学习率是1/累计样本数（Sculley 2010），
+    总耗时与数据量基本无关，几万个topic在CPU上几秒内完成。长期没有样本的中心移到随机样本上。
+    """
+    k = max(1, min(k, len(X)))
+    rng = np.random.default_rng(seed)
+    centers = _kmeans_plus_plus(X, k, rng)
+    counts = np.zeros(k, dtype=np.float64)
+    for _ in range(iterations):
+        batch = X[rng.choice(len(X), min(batch_size, len(X)), replace=False)]
+        labels = assign(batch, centers)
+        batch_counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, batch)
+        updated = batch_counts > 0
+        counts[updated] += batch_counts[updated]
+        rate = (batch_counts[updated] / counts[updated])[:, None]
+        centers[updated] = (1 - rate) * centers[updated] + rate * (sums[updated] / batch_counts[updated][:, None])
+        centers = _normalize(centers)
+        dead = counts == 0
+        if dead.any():
+            centers[dead] = X[rng.choice(len(X), int(dead.sum()))]
+    return centers, assign(X, centers)
+
+
+class IVFIndex:
+    """倒排文件（IVF）近似最近邻索引
+
+    用k-means把向量分成nlist个列表，同一列表的向量连续存放；查询时只在与查询最相似的
+    nprobe个列表里精确计算内积。nlist默认取sqrt(向量数)，每次查询只扫描约 nprobe/nlist 的数据。
+    """
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, ids: np.ndarray, offsets: np.ndarray):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, X: np.ndarray, nlist: Optional[int] = None, seed: int = 0) -> 'IVFIndex':
+        nlist = nlist or max(1, int(math.sqrt(len(X))))
+        centroids, labels = minibatch_kmeans(X, nlist, seed=seed)
+        order = np.argsort(labels, kind='stable')
+        offsets = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+        return cls(centroids, X[order], order.astype(np.int64), offsets)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = ANN_NPROBE) -> Tuple[np.ndarray, np.ndarray]:
+        """返回与query内积最大的k个向量的 (编号, 相似度)，按相似度降序"""
+        probes = np.argsort(-(self.centroids @ query))[:nprobe]
+        slices = [np.arange(self.offsets[p], self.offsets[p + 1]) for p in probes]
+        candidates = np.concatenate(slices) if slices else np.zeros(0, dtype=np.int64)
+        scores = self.vectors[candidates] @ query
+        top = np.argsort(-scores, kind='stable')[:k]
+        return self.ids[candidates[top]], scores[top]
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            np.savez(f, centroids=self.centroids, vectors=self.vectors, ids=self.ids, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path: str) -> 'IVFIndex':
+        with np.load(path) as data:
+            return cls(data['centroids'], data['vectors'], data['ids'], data['offsets'])
+
+
+def topic_text(topic: str) -> str:
+    """topic名中的连字符和下划线换成空格，更接近模型训练时见过的文本"""
+    return topic.replace('-', ' ').replace('_', ' ')
+
+
+def collect_topics(repositories: Iterable[Dict],
+                   descriptions_per_topic: int = DESCRIPTIONS_PER_TOPIC) -> Tuple[Counter, Dict[str, List[str]]]:
+    """流式统计topic出现次数（与analyze_dataset的topic_frequency一致），并为每个topic保留少量仓库描述"""
+    frequency = Counter()
+    descriptions = {}
+    for repo in repositories:
+        topics = parse_topics(repo.get('a.topics', ''))
+        if not topics:
+            continue
+        frequency.update(topics)
+        description = (repo.get('a.description') or '').strip()
+        if not description or not descriptions_per_topic:
+            continue
+        for topic in topics:
+            samples = descriptions.setdefault(topic, [])
+            if len(samples) < descriptions_per_topic:
+                samples.append(description)
+    return frequency, descriptions
+
+
+def embed_topics(topics: List[str], embedder, cache: Optional[EmbeddingCache] = None,
+                 descriptions: Optional[Dict[str, List[str]]] = None,
+                 description_weight: float = DESCRIPTION_WEIGHT) -> Tuple[np.ndarray, int]:
+    """topic的向量：topic名的向量，加上所属仓库描述的平均向量乘以description_weight"""
+    X, new_count = embed_texts([topic_text(topic) for topic in topics], embedder, cache)
+    if not descriptions or not description_weight:
+        return X, new_count
+    texts = [text for topic in topics for text in descriptions.get(topic, [])]
+    if not texts:
+        return X, new_count
+    text_vectors, new_descriptions = embed_texts(texts, embedder, cache)
+    position = 0
+    for row, topic in enumerate(topics):
+        n = len(descriptions.get(topic, []))
+        if n:
+            X[row] += description_weight * text_vectors[position:position + n].mean(axis=0)
+            position += n
+    return _normalize(X), new_count + new_descriptions
+
+
+def cluster_topics(topic_frequency: Counter, descriptions: Optional[Dict[str, List[str]]] = None,
+                   embedder=None, cache: Optional[EmbeddingCache] = None, n_clusters: Optional[int] = None,
+                   min_frequency: int = MIN_TOPIC_FREQUENCY, seed: int = 0) -> Tuple[Dict[str, Any], IVFIndex]:
+    """对topic做两层聚类并计算相关topic，返回 (结果, 近似最近邻索引)
+
+    下层类别由topic向量的mini-batch k-means得到，上层类别再对下层类别的中心聚类，
+    每个类别用其中出现次数最多的topic命名。相关topic来自IVF索引的近似最近邻查询。
+    """
+    embedder = embedder or load_embedder()
+    topics = [topic for topic, count in topic_frequency.most_common() if count >= min_frequency]
+    if not topics:
+        return {'model': embedder.name, 'topics_count': 0, 'clusters': [], 'parents': [], 'related': {}}, None
+
+    start = time.time()
+    X, new_count = embed_topics(topics, embedder, cache, descriptions)
+    embed_seconds = time.time() - start
+
+    start = time.time()
+    k = n_clusters or max(1, round(math.sqrt(len(topics) / 2)))
+    centers, labels = minibatch_kmeans(X, k, seed=seed)
+    parent_centers, parent_labels = minibatch_kmeans(centers, max(1, round(math.sqrt(len(centers)))), seed=seed)
+    index = IVFIndex.build(X, seed=seed)
+    cluster_seconds = time.time() - start
+
+    # topics已按出现次数降序，每个类别的第一个topic就是它的名字
+    members = [[] for _ in range(len(centers))]
+    for row, label in enumerate(labels):
+        members[label].append(row)
+    clusters = []
+    for cluster_id, rows in enumerate(members):
+        if not rows:
+            continue
+        clusters.append({
+            'id': cluster_id,
+            'parent': int(parent_labels[cluster_id]),
+            'label': topics[rows[0]],
+            'size': len(rows),
+            'frequency': sum(topic_frequency[topics[row]] for row in rows),
+            'topics': [topics[row] for row in rows]
+        })
+    clusters.sort(key=lambda c: -c['frequency'])
+
+    parents = {}
+    for cluster in clusters:
+        parent = parents.setdefault(cluster['parent'], {'id': cluster['parent'], 'label': cluster['label'],
+                                                         'frequency': 0, 'clusters': []})
+        parent['frequency'] += cluster['frequency']
+        parent['clusters'].append(cluster['id'])
+
+    start = time.time()
+    related = {}
+    for row, topic in enumerate(topics):
+        ids, scores = index.search(X[row], RELATED_TOPICS + 1)
+        related[topic] = [[topics[i], round(float(s), 4)] for i, s in zip(ids, scores) if i != row][:RELATED_TOPICS]
+    related_seconds = time.time() - start
+
+    result = {
+        'model': embedder.name,
+        'topics_count': len(topics),
+        'new_embeddings': new_count,
+        'timings': {'embed': embed_seconds, 'cluster': cluster_seconds, 'related': related_seconds},
+        'clusters': clusters,
+        'parents': sorted(parents.values(), key=lambda p: -p['frequency']),
+        'related': related
+    }
+    return result, index
+
+
+def main():
+    """用法: python data/topic_clustering.py [data.json|repos_output.jsonl] [输出文件]"""
+    source = sys.argv[1] if len(sys.argv) > 1 else DATA_FILE
+    output_file = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_FILE
+    if not os.path.exists(source):
+        print(f"错误: 数据文件 '{source}' 不存在")
+        return
+
+    start = time.time()
+    frequency, descriptions = collect_topics(iter_data(source))
+    print(f"读取了 {len(frequency)} 个不重复topic，耗时 {time.time() - start:.2f}s")
+
+    cache = EmbeddingCache(CACHE_FILE)
+    try:
+        result, index = cluster_topics(frequency, descriptions, cache=cache)
+    finally:
+        cache.close()
+    if not result['topics_count']:
+        print(f"没有出现次数不少于 {MIN_TOPIC_FREQUENCY} 的topic")
+        return
+
+    timings = result['timings']
+    print(f"向量化 {result['topics_count']} 个topic（新计算 {result['new_embeddings']} 条文本）"
+          f"耗时 {timings['embed']:.2f}s，聚类 {timings['cluster']:.2f}s，相关topic {timings['related']:.2f}s")
+    print(f"得到 {len(result['clusters'])} 个类别，{len(result['parents'])} 个上层类别:")
+    for parent in result['parents'][:10]:
+        labels = [c['label'] for c in result['clusters'] if c['parent'] == parent['id']][:8]
+        print(f"  {parent['label']:<30} {parent['frequency']:>8}  {', '.join(labels)}")
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    index.save(ANN_INDEX_FILE)
+    print(f"\n💾 聚类结果已保存到: {output_file}，近似最近邻索引: {ANN_INDEX_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import os
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from data import iter_data, parse_topics
+
+# 默认的数据文件和输出文件（从仓库根目录运行）
+DATA_FILE = "data/data.json"
+OUTPUT_FILE = "data/topic_cooccurrence.npz"
+# 出现次数少于这个值的topic不进入矩阵
+MIN_TOPIC_FREQUENCY = 2
+# 计算PMI/Jaccard时忽略共现次数少于这个值的topic对，少量共现的PMI波动很大
+MIN_COOCCURRENCE = 2
+# 保存时为每个topic预先算好的邻居数
+TOP_K = 20
+
+METRICS = ('count', 'pmi', 'jaccard')
+
+
+def build_incidence(repositories: Iterable[Dict]) -> Tuple[sp.csr_matrix, List[str]]:
+    """仓库×topic 的0/1关联矩阵（CSR）和列对应的topic；抓取失败的记录不计入"""
+    vocab = {}
+    indices = array('I')
+    indptr = array('Q', [0])
+    for repo in repositories:
+        if repo.get('success') is False:
+            continue
+        for topic in parse_topics(repo.get('a.topics', '')):
+            code = vocab.get(topic)
+            if code is None:
+                code = vocab[topic] = len(vocab)
+            indices.append(code)
+        indptr.append(len(indices))
+    indices = np.frombuffer(indices, dtype=np.uint32).astype(np.int32) if indices else np.zeros(0, dtype=np.int32)
+    indptr = np.frombuffer(indptr, dtype=np.uint64).astype(np.int64)
+    data = np.ones(len(indices), dtype=np.int32)
+    incidence = sp.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(vocab)))
+    return incidence, list(vocab)
+
+
+def _rows(matrix: sp.csr_matrix) -> np.ndarray:
+    """CSR中每个非零元所在的行号"""
+    return np.repeat(np.arange(matrix.shape[0], dtype=np.int32), np.diff(matrix.indptr))
+
+
+def top_k(matrix: sp.csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """每行数值最大的k个元素，返回 (列号, 数值)，不足k个的位置列号为-1
+
+    所有行一起按 (行号, -数值) 排序后取每行的前k个，不逐行循环。
+    """
+    rows = _rows(matrix)
+    order = np.lexsort((-matrix.data, rows))
+    ranks = np.arange(len(order)) - matrix.indptr[rows[order]]
+    keep = ranks < k
+    neighbours = np.full((matrix.shape[0], k), -1, dtype=np.int32)
+    scores = np.zeros((matrix.shape[0], k), dtype=np.float32)
+    neighbours[rows[order[keep]], ranks[keep]] = matrix.indices[order[keep]]
+    scores[rows[order[keep]], ranks[keep]] = matrix.data[order[keep]]
+    return neighbours, scores
+
+
+class TopicCooccurrence:
+    """topic共现矩阵及由它导出的相似度
+
+    共现矩阵 C = XᵀX，X是仓库×topic的关联矩阵；对角线是每个topic出现的仓库数，
+    非对角元素是两个topic一起出现的仓库数。PMI = log(c·N / (df_i·df_j))，
+    Jaccard = c / (df_i + df_j - c)，都在C的非零元素上整体向量化计算。
+    """
+
+    def __init__(self, vocab: List[str], counts: sp.csr_matrix, n_docs: int):
+        self.vocab = vocab
+        self.codes = {topic: code for code, topic in enumerate(vocab)}
+        self.counts = counts
+        self.n_docs = n_docs
+        self.frequency = counts.diagonal()
+        self._similarity = {}
+        self._top_k = {}
+
+    @classmethod
+    def from_records(cls, repositories: Iterable[Dict],
+                     min_frequency: int = MIN_TOPIC_FREQUENCY) -> 'TopicCooccurrence':
+        incidence, vocab = build_incidence(repositories)
+        frequency = np.asarray(incidence.sum(axis=0)).ravel()
+        # 按出现次数降序重新编号，只保留足够常见的topic
+        order = np.argsort(-frequency, kind='stable')
+        order = order[frequency[order] >= min_frequency]
+        incidence = incidence[:, order].tocsr()
+        counts = (incidence.T @ incidence).tocsr()
+        counts.sort_indices()
+        return cls([vocab[i] for i in order], counts, incidence.shape[0])
+
+    def similarity(self, metric: str = 'pmi', min_count: int = MIN_COOCCURRENCE) -> sp.csr_matrix:
+        """topic×topic的相似度矩阵（不含对角线），只包含共现次数不少于min_count的topic对"""
+        if metric not in METRICS:
+            raise ValueError(f"未知的相似度: {metric}，可选 {', '.join(METRICS)}")
+        key = (metric, min_count)
+        if key not in self._similarity:
+            counts = self.counts
+            rows = _rows(counts)
+            cols = counts.indices
+            c = counts.data.astype(np.float64)
+            keep = (rows != cols) & (c >= min_count)
+            rows, cols, c = rows[keep], cols[keep], c[keep]
+            df_i = self.frequency[rows].astype(np.float64)
+            df_j = self.frequency[cols].astype(np.float64)
+            if metric == 'pmi':
+                values = np.log(c * self.n_docs / (df_i * df_j))
+            elif metric == 'jaccard':
+                values = c / (df_i + df_j - c)
+            else:
+                values = c
+            self._similarity[key] = sp.csr_matrix((values.astype(np.float32), (rows, cols)), shape=counts.shape)
+        return self._similarity[key]
+
+    def top_k(self, metric: str = 'pmi', k: int = TOP_K) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._top_k.get(metric)
+        if cached is None or cached[0].shape[1] < k:
+            cached = self._top_k[metric] = top_k(self.similarity(metric), k)
+        return cached[0][:, :k], cached[1][:, :k]
+
+    def count(self, a: str, b: str) -> int:
+        """两个topic一起出现的仓库数；a == b 时就是topic出现的仓库数"""
+        if a not in self.codes or b not in self.codes:
+            return 0
+        return int(self.counts[self.codes[a], self.codes[b]])
+
+    def neighbours(self, topic: str, n: int = 10, metric: str = 'pmi') -> List[Tuple[str, float]]:
+        code = self.codes.get(topic)
+        if code is None:
+            return []
+        neighbours, scores = self.top_k(metric, max(n, TOP_K))
+        return [(self.vocab[c], float(s)) for c, s in zip(neighbours[code, :n], scores[code, :n]) if c >= 0]
+
+    def save(self, path: str = OUTPUT_FILE, k: int = TOP_K) -> None:
+        """共现矩阵的CSR数组、topic列表和预先算好的邻居一起存成一个压缩的npz"""
+        arrays = {
+            'vocab': np.array(self.vocab, dtype=str),
+            'n_docs': np.array(self.n_docs),
+            'data': self.counts.data,
+            'indices': self.counts.indices,
+            'indptr': self.counts.indptr,
+        }
+        for metric in METRICS:
+            arrays[f'{metric}_neighbours'], arrays[f'{metric}_scores'] = self.top_k(metric, k)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = OUTPUT_FILE) -> 'TopicCooccurrence':
+        with np.load(path) as data:
+            vocab = data['vocab'].tolist()
+            counts = sp.csr_matrix((data['data'], data['indices'], data['indptr']), shape=(len(vocab), len(vocab)))
+            result = cls(vocab, counts, int(data['n_docs']))
+            for metric in METRICS:
+                if f'{metric}_neighbours' in data:
+                    result._top_k[metric] = (data[f'{metric}_neighbours'], data[f'{metric}_scores'])
+        return result
+
+
+def main():
+    """用法:
+    python data/topic_cooccurrence.py build [data.json|repos_output.jsonl] [--matrix 输出文件]
+    python data/topic_cooccurrence.py neighbours <topic> [pmi|jaccard|count] [数量] [--matrix 输出文件]
+    """
+    args = sys.argv[1:]
+    if not args or args[0] not in ('build', 'neighbours'):
+        print(main.__doc__)
+        return
+    path = OUTPUT_FILE
+    if '--matrix' in args:
+        i = args.index('--matrix')
+        path = args[i + 1]
+        args = args[:i] + args[i + 2:]
+
+    if args[0] == 'build':
+        source = args[1] if len(args) > 1 else DATA_FILE
+        if not os.path.exists(source):
+            print(f"错误: 数据文件 '{source}' 不存在")
+            return
+        start = time.time()
+        cooccurrence = TopicCooccurrence.from_records(iter_data(source))
+        print(f"{cooccurrence.n_docs} 个仓库，{len(cooccurrence.vocab)} 个topic，"
+              f"{cooccurrence.counts.nnz} 个非零共现，耗时 {time.time() - start:.2f}s")
+        start = time.time()
+        cooccurrence.save(path)
+        print(f"✅ 已计算相似度和前 {TOP_K} 个邻居并保存到: {path}，耗时 {time.time() - start:.2f}s")
+        return
+
+    if len(args) < 2:
+        print(main.__doc__)
+        return
+    metric = args[2] if len(args) > 2 else 'pmi'
+    n = int(args[3]) if len(args) > 3 else 10
+    start = time.time()
+    cooccurrence = TopicCooccurrence.load(path)
+    results = cooccurrence.neighbours(args[1], n, metric)
+    elapsed = (time.time() - start) * 1000
+    for topic, score in results:
+        print(f"  {topic:<40} {score:.4f}")
+    print(f"共 {len(results)} 条，耗时 {elapsed:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
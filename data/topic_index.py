@@ -0,0 +1,255 @@
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from array import array
+from collections import Counter
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from data import iter_data, parse_topics
+
+# 默认的爬虫输出和索引文件（从仓库根目录运行）
+OUTPUT_FILE = "dataset/repos_output.jsonl"
+INDEX_FILE = "data/topic_index.sqlite"
+# 缓存解压后的倒排表个数
+POSTINGS_CACHE_SIZE = 1024
+
+
+def _encode(doc_ids: List[int]) -> bytes:
+    """升序的文档编号 -> 差值编码后zlib压缩"""
+    deltas = array('I', (b - a for a, b in zip([0] + doc_ids, doc_ids)))
+    return zlib.compress(deltas.tobytes())
+
+
+def _decode(blob: bytes) -> array:
+    deltas = array('I')
+    deltas.frombytes(zlib.decompress(blob))
+    return array('I', accumulate(deltas))
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def build_index(repositories: Iterable[Dict], path: str = INDEX_FILE) -> int:
+    """根据爬虫记录构建倒排索引，返回索引中的仓库数
+
+    同一个仓库出现多次时以最后一次为准，抓取失败的记录不计入。
+    每个topic的倒排表是升序文档编号的差值编码，zlib压缩后存进sqlite；
+    另外保存每个仓库的topic编号（正排）和total_openrank，用于共现统计和过滤。
+    """
+    repos = {}
+    for record in repositories:
+        if record.get('success') is False:
+            continue
+        key = str(record.get('repo_id') or record.get('b.repo_name'))
+        repos.pop(key, None)
+        repos[key] = (record.get('b.repo_name'), _to_float(record.get('total_openrank')),
+                      parse_topics(record.get('a.topics', '')))
+
+    vocab = {}
+    postings = []
+    forward = array('I')
+    offsets = array('Q', [0])
+    openrank = array('d')
+    docs = []
+    for doc_id, (repo_id, (repo_name, rank, topics)) in enumerate(repos.items()):
+        docs.append((doc_id, repo_id, repo_name, None if math.isnan(rank) else rank))
+        openrank.append(rank)
+        for topic in topics:
+            code = vocab.get(topic)
+            if code is None:
+                code = vocab[topic] = len(vocab)
+                postings.append([])
+            postings[code].append(doc_id)
+            forward.append(code)
+        offsets.append(len(forward))
+
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE docs (doc_id INTEGER PRIMARY KEY, repo_id TEXT, repo_name TEXT, total_openrank REAL)")
+    conn.execute("CREATE TABLE postings (topic TEXT PRIMARY KEY, df INTEGER, data BLOB) WITHOUT ROWID")
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value BLOB)")
+    conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", docs)
+    conn.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                     ((topic, len(postings[code]), _encode(postings[code])) for topic, code in vocab.items()))
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ('vocab', zlib.compress(json.dumps(list(vocab), ensure_ascii=False).encode('utf-8'))),
+        ('forward', zlib.compress(forward.tobytes())),
+        ('offsets', zlib.compress(offsets.tobytes())),
+        ('openrank', zlib.compress(openrank.tobytes())),
+    ])
+    conn.commit()
+    conn.close()
+    # 构建完成后原子替换，查询方不会读到一半的索引
+    os.replace(tmp_path, path)
+    return len(docs)
+
+
+class TopicIndex:
+    """topic 倒排索引的查询接口
+
+    打开时只加载每个仓库的total_openrank；倒排表按需读取并缓存，正排只在共现查询时加载。
+    """
+
+    def __init__(self, path: str = INDEX_FILE):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"索引文件 '{path}' 不存在，请先运行 build")
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self.openrank = self._load_array('openrank', 'd')
+        self._vocab = None
+        self._forward = None
+        self._offsets = None
+        self.postings = lru_cache(maxsize=POSTINGS_CACHE_SIZE)(self._postings)
+
+    def _load_array(self, key: str, typecode: str) -> array:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        values = array(typecode)
+        values.frombytes(zlib.decompress(row[0]))
+        return values
+
+    def __len__(self) -> int:
+        return len(self.openrank)
+
+    def _postings(self, topic: str) -> array:
+        """包含topic的仓库的文档编号（升序）"""
+        row = self._conn.execute("SELECT data FROM postings WHERE topic = ?", (topic,)).fetchone()
+        return _decode(row[0]) if row else array('I')
+
+    def document_frequency(self, topic: str) -> int:
+        row = self._conn.execute("SELECT df FROM postings WHERE topic = ?", (topic,)).fetchone()
+        return row[0] if row else 0
+
+    def match(self, all_of: Iterable[str] = (), any_of: Iterable[str] = (),
+              min_openrank: Optional[float] = None, max_openrank: Optional[float] = None) -> List[int]:
+        """同时包含all_of中全部topic、并且至少包含any_of中一个topic的文档编号"""
+        all_of = sorted(set(all_of), key=self.document_frequency)
+        any_of = list(any_of)
+        if not all_of and not any_of:
+            raise ValueError("至少需要指定一个topic")
+
+        result = None
+        # 从最短的倒排表开始求交集
+        for topic in all_of:
+            docs = self.postings(topic)
+            result = set(docs) if result is None else result.intersection(docs)
+            if not result:
+                return []
+        if any_of:
+            union = set()
+            for topic in any_of:
+                union.update(self.postings(topic))
+            result = union if result is None else result & union
+
+        if min_openrank is not None or max_openrank is not None:
+            low = -math.inf if min_openrank is None else min_openrank
+            high = math.inf if max_openrank is None else max_openrank
+            openrank = self.openrank
+            # NaN 与任何数比较都为False，缺少openrank的仓库会被过滤掉
+            result = [d for d in result if low <= openrank[d] <= high]
+        return sorted(result)
+
+    def repos(self, doc_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        doc_ids = list(doc_ids)
+        rows = {}
+        for i in range(0, len(doc_ids), 900):
+            chunk = doc_ids[i:i + 900]
+            placeholders = ",".join("?" * len(chunk))
+            for row in self._conn.execute(
+                    f"SELECT doc_id, repo_id, repo_name, total_openrank FROM docs WHERE doc_id IN ({placeholders})", chunk):
+                rows[row[0]] = {'repo_id': row[1], 'repo_name': row[2], 'total_openrank': row[3]}
+        return [rows[d] for d in doc_ids]
+
+    def query(self, all_of: Iterable[str] = (), any_of: Iterable[str] = (),
+              min_openrank: Optional[float] = None, max_openrank: Optional[float] = None,
+              limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """返回匹配的仓库，按total_openrank从高到低排序"""
+        docs = self.match(all_of, any_of, min_openrank, max_openrank)
+        openrank = self.openrank
+        docs.sort(key=lambda d: -openrank[d] if openrank[d] == openrank[d] else math.inf)
+        return self.repos(docs[:limit] if limit is not None else docs)
+
+    def _load_forward(self) -> None:
+        if self._forward is None:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'vocab'").fetchone()
+            self._vocab = json.loads(zlib.decompress(row[0]))
+            self._offsets = self._load_array('offsets', 'Q')
+            self._forward = self._load_array('forward', 'I')
+
+    def co_occurring(self, topic: str, n: int = 20, min_openrank: Optional[float] = None,
+                     max_openrank: Optional[float] = None) -> List[Tuple[str, int]]:
+        """与topic一起出现次数最多的n个topic"""
+        self._load_forward()
+        forward, offsets = self._forward, self._offsets
+        counts = Counter()
+        for d in self.match([topic], min_openrank=min_openrank, max_openrank=max_openrank):
+            counts.update(forward[offsets[d]:offsets[d + 1]])
+        vocab = self._vocab
+        result = [(vocab[c], count) for c, count in counts.most_common(n + 1) if vocab[c] != topic]
+        return result[:n]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main():
+    """用法:
+    python data/topic_index.py build [repos_output.jsonl|data.json] [--index 索引文件]
+    python data/topic_index.py and <topic> [<topic> ...] [--min-openrank X] [--index 索引文件]
+    python data/topic_index.py or <topic> [<topic> ...] [--min-openrank X] [--index 索引文件]
+    python data/topic_index.py cooc <topic> [--min-openrank X] [--index 索引文件]
+    """
+    args = sys.argv[1:]
+    if not args:
+        print(main.__doc__)
+        return
+    command, args = args[0], args[1:]
+    path = INDEX_FILE
+    if '--index' in args:
+        i = args.index('--index')
+        path = args[i + 1]
+        args = args[:i] + args[i + 2:]
+
+    if command == 'build':
+        source = args[0] if args else OUTPUT_FILE
+        start = time.time()
+        count = build_index(iter_data(source), path)
+        print(f"✅ 已为 {count} 个仓库建立topic索引: {path}，耗时 {time.time() - start:.2f}s")
+        return
+
+    min_openrank = None
+    if '--min-openrank' in args:
+        i = args.index('--min-openrank')
+        min_openrank = float(args[i + 1])
+        args = args[:i] + args[i + 2:]
+    index = TopicIndex(path)
+    start = time.time()
+    if command == 'and':
+        results = index.query(all_of=args, min_openrank=min_openrank)
+    elif command == 'or':
+        results = index.query(any_of=args, min_openrank=min_openrank)
+    elif command == 'cooc':
+        results = index.co_occurring(args[0], min_openrank=min_openrank)
+    else:
+        print(main.__doc__)
+        return
+    elapsed = (time.time() - start) * 1000
+    for item in results:
+        print(f"  {item}")
+    print(f"共 {len(results)} 条，耗时 {elapsed:.1f}ms")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
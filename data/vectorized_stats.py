@@ -0,0 +1,211 @@
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, Any, Iterable
+
+import numpy as np
+
+from data import iter_data, parse_topics, _decode_topics, print_statistics, save_statistics, MALFORMED_SAMPLE_SIZE
+
+# 表中保留的样本仓库数量，与analyze_dataset的sample_repositories一致
+SAMPLE_SIZE = 10
+
+
+def build_table(repositories: Iterable[Dict]) -> Dict[str, np.ndarray]:
+    """把仓库记录转换成列式表
+
+    每个仓库一行：has_description、has_readme、topic_count；
+    topics展开成一列topic_codes（按仓库顺序拼接），topic_vocab按首次出现的顺序编号，
+    这样value counts的并列顺序与Counter.most_common一致，统计结果和analyze_dataset完全相同。
+    """
+    has_description = []
+    has_readme = []
+    topic_count = []
+    topic_codes = []
+    vocab = {}
+    sample_names = []
+    sample_descriptions = []
+    malformed_count = 0
+    malformed_samples = []
+
+    for repo in repositories:
+        description = repo.get('a.description') or ''
+        readme = repo.get('a.readme_text') or repo.get('readme_sha256') or ''
+        topics_str = repo.get('a.topics', '')
+        has_description.append(bool(description.strip()))
+        has_readme.append(bool(readme.strip()))
+
+        topics = parse_topics(topics_str)
+        if not topics and isinstance(topics_str, str) and topics_str and _decode_topics(topics_str) is None:
+            malformed_count += 1
+            if len(malformed_samples) < MALFORMED_SAMPLE_SIZE:
+                malformed_samples.append(topics_str)
+        topic_count.append(len(topics))
+        for topic in topics:
+            code = vocab.get(topic)
+            if code is None:
+                code = vocab[topic] = len(vocab)
+            topic_codes.append(code)
+
+        if len(sample_names) < SAMPLE_SIZE:
+            sample_names.append(repo.get('b.repo_name', 'Unknown'))
+            sample_descriptions.append(description[:100] + '...' if len(description) > 100 else description)
+
+    return {
+        'has_description': np.array(has_description, dtype=bool),
+        'has_readme': np.array(has_readme, dtype=bool),
+        'topic_count': np.array(topic_count, dtype=np.int32),
+        'topic_codes': np.array(topic_codes, dtype=np.int32),
+        'topic_vocab': np.array(list(vocab), dtype=str),
+        'sample_names': np.array(sample_names, dtype=str),
+        'sample_descriptions': np.array(sample_descriptions, dtype=str),
+        'malformed_count': np.array(malformed_count),
+        'malformed_samples': np.array(malformed_samples, dtype=str),
+    }
+
+
+def build_table_from_parquet(directory: str) -> Dict[str, np.ndarray]:
+    """直接从爬虫写出的Parquet数据集构建列式表，全部使用Arrow的向量化计算
+
+    只读取description、readme_text（以及readme_sha256）、topics、repo_name这几列。爬虫输出的topics本来就是列表，
+    并列topic的先后按列表中的顺序，而不是analyze_dataset里集合的迭代顺序。
+    """
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(directory, format="parquet")
+    columns = ['repo_name', 'description', 'readme_text', 'topics']
+    if 'readme_sha256' in dataset.schema.names:
+        columns.append('readme_sha256')
+    table = dataset.to_table(columns=columns)
+
+    def non_blank(column):
+        return pc.fill_null(pc.greater(pc.utf8_length(pc.utf8_trim_whitespace(column)), 0), False)
+
+    topics = table['topics'].combine_chunks()
+    encoded = pc.dictionary_encode(pc.list_flatten(topics))
+    has_readme = non_blank(table['readme_text'])
+    if 'readme_sha256' in table.column_names:
+        has_readme = pc.or_(has_readme, pc.is_valid(table['readme_sha256']))
+    head = table.slice(0, SAMPLE_SIZE).to_pylist()
+    return {
+        'has_description': non_blank(table['description']).to_numpy(zero_copy_only=False),
+        'has_readme': has_readme.to_numpy(zero_copy_only=False),
+        'topic_count': pc.fill_null(pc.list_value_length(topics), 0).to_numpy(zero_copy_only=False).astype(np.int32),
+        'topic_codes': encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32),
+        'topic_vocab': np.array(encoded.dictionary.to_pylist(), dtype=str),
+        'sample_names': np.array([r['repo_name'] or 'Unknown' for r in head], dtype=str),
+        'sample_descriptions': np.array([
+            (r['description'] or '')[:100] + '...' if len(r['description'] or '') > 100 else (r['description'] or '')
+            for r in head
+        ], dtype=str),
+        'malformed_count': np.array(0),
+        'malformed_samples': np.array([], dtype=str),
+    }
+
+
+def save_table(table: Dict[str, np.ndarray], path: str) -> None:
+    np.savez_compressed(path, **table)
+
+
+def load_table(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path) as f:
+        return {key: f[key] for key in f.files}
+
+
+def _ordered_counter(values: np.ndarray) -> Counter:
+    """value counts，键按首次出现的顺序排列（与逐个累加的Counter一致）"""
+    if len(values) == 0:
+        return Counter()
+    uniques, first_index, counts = np.unique(values, return_index=True, return_counts=True)
+    order = np.argsort(first_index, kind='stable')
+    return Counter({int(uniques[i]): int(counts[i]) for i in order})
+
+
+def compute_stats(table: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """用向量化运算计算与analyze_dataset相同结构的统计结果"""
+    has_description = table['has_description']
+    has_readme = table['has_readme']
+    topic_count = table['topic_count']
+    vocab = table['topic_vocab']
+
+    total = int(len(topic_count))
+    with_topics_mask = topic_count > 0
+    with_topics = int(with_topics_mask.sum())
+    occurrences = int(topic_count.sum())
+    frequency = np.bincount(table['topic_codes'], minlength=len(vocab))
+    # 稳定排序：次数相同的topic按首次出现的顺序，与Counter.most_common一致
+    top = np.argsort(-frequency, kind='stable')[:30]
+    vocab_list = vocab.tolist()
+
+    offsets = np.concatenate(([0], np.cumsum(topic_count[:SAMPLE_SIZE], dtype=np.int64)))
+    samples = []
+    for i, name in enumerate(table['sample_names'].tolist()):
+        codes = table['topic_codes'][offsets[i]:offsets[i + 1]]
+        samples.append({
+            'repo_name': name,
+            'description': str(table['sample_descriptions'][i]),
+            'topics_count': int(topic_count[i]),
+            'topics': [vocab_list[c] for c in codes[:5]]
+        })
+
+    counted = topic_count[with_topics_mask]
+    stats = {
+        'total_repositories': total,
+        'repositories_with_topics': with_topics,
+        'repositories_without_topics': total - with_topics,
+        'total_topic_occurrences': occurrences,
+        'unique_topics': vocab_list,
+        'topic_frequency': Counter(dict(zip(vocab_list, frequency.tolist()))),
+        'repositories_with_description': int(has_description.sum()),
+        'repositories_with_readme': int(has_readme.sum()),
+        'repositories_with_both_desc_readme': int((has_description & has_readme).sum()),
+        'empty_descriptions': int((~has_description).sum()),
+        'empty_readmes': int((~has_readme).sum()),
+        'avg_topics_per_repo': occurrences / with_topics if with_topics else 0,
+        'max_topics_per_repo': int(counted.max()) if with_topics else 0,
+        'min_topics_per_repo': int(counted.min()) if with_topics else 0,
+        'repos_by_topic_count': _ordered_counter(counted),
+        'top_topics': [(vocab_list[i], int(frequency[i])) for i in top],
+        'sample_repositories': samples,
+        'malformed_topics_count': int(table['malformed_count']),
+        'malformed_topics_samples': table['malformed_samples'].tolist()
+    }
+    stats['unique_topics_count'] = len(vocab_list)
+    return stats
+
+
+def main():
+    """用法: python data/vectorized_stats.py <data.json|repos_output.jsonl|Parquet目录|table.npz> [表缓存.npz]
+
+    从原始数据构建列式表时，如果给出第二个参数，会把表保存下来，之后直接加载表即可秒级出报告。
+    """
+    if len(sys.argv) < 2:
+        print(main.__doc__)
+        return
+    source = sys.argv[1]
+    start = time.time()
+    if source.endswith('.npz'):
+        table = load_table(source)
+    elif os.path.isdir(source):
+        table = build_table_from_parquet(source)
+    else:
+        table = build_table(iter_data(source))
+    print(f"列式表就绪，耗时 {time.time() - start:.2f}s")
+    if len(sys.argv) > 2:
+        save_table(table, sys.argv[2])
+        print(f"列式表已保存到: {sys.argv[2]}")
+
+    start = time.time()
+    stats = compute_stats(table)
+    print(f"统计完成，耗时 {time.time() - start:.2f}s")
+    if stats['total_repositories'] == 0:
+        print("没有加载到有效数据")
+        return
+    print_statistics(stats)
+    save_statistics(stats, "data_statistics_vectorized.json")
+
+
+if __name__ == "__main__":
+    main()
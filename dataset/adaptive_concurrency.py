@@ -0,0 +1,92 @@
+import threading
+import time
+
+OK = "ok"
+ERROR = "error"
+THROTTLED = "throttled"
+
+
+class AdaptiveConcurrency:
+    """按 AIMD 调整同时在途的请求数
+
+    每个请求结束后用 release() 汇报耗时和结果：
+    - 正常完成且延迟没有明显上升时加性增加，每经过一“轮”（limit 个请求）上限加 1；
+    - 延迟超过基线的 latency_tolerance 倍时乘以 latency_backoff，网络或服务端开始排队；
+    - 出错（超时、5xx）时乘以 error_backoff，被限流（403/429，包括二级限流）时乘以 throttle_backoff。
+    一次拥塞往往让一整批在途请求同时报错，所以两次减小之间至少间隔一个平均延迟。
+    传入 RateLimitScheduler 时，所有 token 的剩余额度低于 budget_floor 比例就不再增加：
+    额度已经由调度器限速，并发再高也只是让线程排队。
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64, latency_tolerance=2.0,
+                 latency_backoff=0.9, error_backoff=0.8, throttle_backoff=0.5,
+                 budget_floor=0.1, scheduler=None):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.latency_backoff = latency_backoff
+        self.error_backoff = error_backoff
+        self.throttle_backoff = throttle_backoff
+        self.budget_floor = budget_floor
+        self.scheduler = scheduler
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._latency = None
+        self._baseline = None
+        self._hold_until = 0.0
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency, outcome=OK):
+        with self._cond:
+            self.in_flight -= 1
+            self._observe(latency, outcome)
+            self._cond.notify_all()
+
+    def _budget_low(self):
+        if self.scheduler is None:
+            return False
+        budgets = [b for b in self.scheduler.snapshot() if b["limit"]]
+        if not budgets:
+            return False
+        remaining = sum(max(b["remaining"] or 0, 0) for b in budgets)
+        return remaining < self.budget_floor * sum(b["limit"] for b in budgets)
+
+    def _observe(self, latency, outcome):
+        now = time.monotonic()
+        if outcome == OK:
+            self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            # 基线取观察到的最小延迟，并缓慢向当前延迟靠拢，适应网络环境的变化
+            if self._baseline is None or latency < self._baseline:
+                self._baseline = latency
+            else:
+                self._baseline += (self._latency - self._baseline) * 0.01
+
+        if outcome == THROTTLED:
+            factor = self.throttle_backoff
+        elif outcome == ERROR:
+            factor = self.error_backoff
+        elif self._latency > self._baseline * self.latency_tolerance:
+            factor = self.latency_backoff
+        else:
+            if not self._budget_low():
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            return
+
+        if now >= self._hold_until:
+            self.limit = max(self.min_limit, self.limit * factor)
+            self._hold_until = now + (self._latency or latency)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "latency": self._latency,
+                "baseline": self._baseline
+            }
@@ -0,0 +1,102 @@
+import json
+import os
+import sqlite3
+import threading
+
+# 运行中 add() 的记录先留在内存里，攒够这么多条后从断点文件同步一次
+SYNC_EVERY = 10000
+
+
+class CompletedIndex:
+    """success_repos.jsonl 的磁盘索引，用来判断仓库是否已经抓取成功
+
+    success_repos.jsonl 仍然是唯一的断点记录，索引只是它的可重建副本：
+    sync() 从上次读到的字节偏移继续扫描新追加的行，不需要把整个文件读进内存；
+    add() 只记在内存里，索引只通过 sync() 从断点文件写入：写线程还没落盘的仓库
+    不会先进入索引，崩溃后重启时这些仓库会被重新抓取，而不是被永久跳过。
+    """
+
+    def __init__(self, path, success_file):
+        self.path = path
+        self.success_file = success_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS completed (repo_id TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        # 本次运行完成、但还没从断点文件同步进索引的仓库
+        self._added = set()
+        self._unsynced = 0
+
+    def _get_meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def sync(self, batch_size=10000):
+        """把断点文件中新追加的记录同步进索引"""
+        if not os.path.exists(self.success_file):
+            size = 0
+        else:
+            size = os.path.getsize(self.success_file)
+        with self._lock:
+            offset = int(self._get_meta("offset", 0))
+            if offset > size:
+                # 断点文件被截断或替换过，从头重建
+                self._conn.execute("DELETE FROM completed")
+                offset = 0
+            if size == 0:
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('offset', '0')")
+                self._conn.commit()
+                return
+
+            with open(self.success_file, "rb") as f:
+                f.seek(offset)
+                batch = []
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # 最后一行可能写了一半，留到下次再读
+                        break
+                    offset += len(line)
+                    if line.strip():
+                        batch.append((json.loads(line)["repo_id"],))
+                    if len(batch) >= batch_size:
+                        self._conn.executemany("INSERT OR IGNORE INTO completed VALUES (?)", batch)
+                        batch.clear()
+                self._conn.executemany("INSERT OR IGNORE INTO completed VALUES (?)", batch)
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('offset', ?)", (str(offset),))
+            self._conn.commit()
+
+    def _indexed(self, repo_id):
+        return self._conn.execute(
+            "SELECT 1 FROM completed WHERE repo_id = ?", (repo_id,)
+        ).fetchone() is not None
+
+    def __contains__(self, repo_id):
+        with self._lock:
+            return repo_id in self._added or self._indexed(repo_id)
+
+    def add(self, repo_id):
+        """记录本次运行完成的仓库；调用方应已把它的断点记录交给写线程"""
+        with self._lock:
+            if self._indexed(repo_id):
+                return
+            self._added.add(repo_id)
+            self._unsynced += 1
+            if self._unsynced < SYNC_EVERY:
+                return
+            self._unsynced = 0
+        # 已经落盘的记录进入索引后就不必再留在内存里
+        self.sync()
+        with self._lock:
+            self._added = {r for r in self._added if not self._indexed(r)}
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completed").fetchone()[0] + len(self._added)
+
+    def close(self):
+        # 写线程关闭后断点文件已经完整，同步一次，下次启动时不用再扫描
+        self.sync()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,119 @@
+import json
+import os
+import sys
+import time
+
+# 每个 part 文件的行数，也是写入时在内存中缓冲的行数
+ROW_GROUP_SIZE = 5000
+COMPRESSION = "zstd"
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("repo_id", pa.int64()),
+        ("repo_name", pa.string()),
+        ("total_openrank", pa.float64()),
+        ("description", pa.string()),
+        ("homepage_url", pa.string()),
+        ("topics", pa.list_(pa.string())),
+        ("readme_text", pa.string()),
+        ("readme_sha256", pa.string()),
+    ])
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ParquetSink:
+    """把抓取结果按列写成 zstd 压缩的 Parquet 数据集（一个目录，多个 part 文件）
+
+    Parquet 文件不能追加，所以每攒够 row_group_size 行就原子地写出一个新的 part 文件，
+    断点续爬的每次运行也只是往目录里新增文件。分析时可以只读需要的列。
+    repos_output.jsonl 仍是权威输出：进程崩溃时内存中未写出的行会丢失，
+    可以用 `python columnar_output.py repos_output.jsonl <目录>` 从 JSONL 重建。
+    """
+
+    def __init__(self, directory, row_group_size=ROW_GROUP_SIZE, compression=COMPRESSION):
+        import pyarrow  # noqa: F401  尽早暴露缺少依赖的问题
+
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._rows = []
+        self._run = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+        self._seq = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, record):
+        self._rows.append(record)
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = {
+            "repo_id": [_to_int(r.get("repo_id")) for r in self._rows],
+            "repo_name": [r.get("repo_name") for r in self._rows],
+            "total_openrank": [_to_float(r.get("total_openrank")) for r in self._rows],
+            "description": [r.get("description") for r in self._rows],
+            "homepage_url": [r.get("homepage_url") for r in self._rows],
+            "topics": [list(r.get("topics") or []) for r in self._rows],
+            "readme_text": [r.get("readme_text") for r in self._rows],
+            "readme_sha256": [r.get("readme_sha256") for r in self._rows],
+        }
+        table = pa.table(columns, schema=_schema())
+        name = f"part-{self._run}-{self._seq:05d}.parquet"
+        path = os.path.join(self.directory, name)
+        # 临时文件以 . 开头：pyarrow.dataset 默认跳过，崩溃留下的半个文件不会被读到
+        tmp_path = os.path.join(self.directory, f".{name}.tmp")
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+        self._seq += 1
+        self._rows.clear()
+
+    def close(self):
+        self.flush()
+
+
+def read_columns(directory, columns=None):
+    """读取数据集中的指定列，返回 pyarrow.Table"""
+    import pyarrow.dataset as ds
+
+    return ds.dataset(directory, format="parquet").to_table(columns=columns)
+
+
+def convert_jsonl(jsonl_file, directory, row_group_size=ROW_GROUP_SIZE):
+    sink = ParquetSink(directory, row_group_size=row_group_size)
+    count = 0
+    with open(jsonl_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                sink.write(json.loads(line))
+                count += 1
+    sink.close()
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("用法: python columnar_output.py <repos_output.jsonl> <输出目录>")
+        sys.exit(1)
+    total = convert_jsonl(sys.argv[1], sys.argv[2])
+    print(f"✅ 已转换 {total} 条记录到 {sys.argv[2]}")
@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 延迟直方图的桶上界（秒）：1ms 到约 65s，按 2 倍递增
+LATENCY_BUCKETS = tuple(0.001 * 2 ** i for i in range(17))
+
+
+class Histogram:
+    """固定桶的直方图，分位数在桶内线性插值，内存不随请求数增长"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                low = self.buckets[i - 1] if i else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.buckets[-1] * 2
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class CrawlerMetrics:
+    """抓取过程的结构化指标
+
+    记录每个接口（repo / readme / graphql）的请求数、状态码、延迟直方图和下载字节数，
+    按 fail_reason 统计的重试和最终失败次数，以及通过 gauge() 注册的实时数值
+    （队列长度、限流等待时间等，导出时才调用）。所有方法都是线程安全的。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = {}
+        self.latency = {}
+        self.bytes = {}
+        self.counters = {}
+        self._gauges = {}
+        self._last = (self.started, 0)
+
+    def observe_request(self, endpoint, latency, nbytes, status):
+        with self._lock:
+            key = (endpoint, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.get(endpoint)
+            if histogram is None:
+                histogram = self.latency[endpoint] = Histogram()
+            histogram.observe(latency)
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + nbytes
+
+    def inc(self, name, label=None, value=1):
+        with self._lock:
+            key = (name, label)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, fn):
+        """注册一个导出时才求值的数值，例如 lambda: len(queue)"""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def _gauge_values(self):
+        values = {}
+        for name, fn in list(self._gauges.items()):
+            try:
+                values[name] = fn()
+            except Exception:
+                values[name] = None
+        return values
+
+    def snapshot(self):
+        gauges = self._gauge_values()
+        with self._lock:
+            now = time.time()
+            total = sum(self.requests.values())
+            last_time, last_total = self._last
+            self._last = (now, total)
+            counters = {}
+            for (name, label), value in self.counters.items():
+                if label is None:
+                    counters[name] = value
+                else:
+                    counters.setdefault(name, {})[label] = value
+            return {
+                "timestamp": now,
+                "uptime": now - self.started,
+                "requests_total": total,
+                "requests_per_sec": total / max(now - self.started, 1e-9),
+                "recent_requests_per_sec": (total - last_total) / max(now - last_time, 1e-9),
+                "endpoints": {
+                    endpoint: {
+                        "count": histogram.count,
+                        "p50": histogram.quantile(0.5),
+                        "p95": histogram.quantile(0.95),
+                        "p99": histogram.quantile(0.99),
+                        "bytes": self.bytes.get(endpoint, 0),
+                        "status": {s: n for (e, s), n in self.requests.items() if e == endpoint},
+                    }
+                    for endpoint, histogram in self.latency.items()
+                },
+                "counters": counters,
+                "gauges": gauges,
+            }
+
+    def render_prometheus(self):
+        """Prometheus 文本格式"""
+        gauges = self._gauge_values()
+        lines = []
+        with self._lock:
+            lines.append("# TYPE crawler_requests_total counter")
+            for (endpoint, status), n in sorted(self.requests.items()):
+                lines.append(f'crawler_requests_total{{endpoint="{endpoint}",status="{status}"}} {n}')
+            lines.append("# TYPE crawler_response_bytes_total counter")
+            for endpoint, n in sorted(self.bytes.items()):
+                lines.append(f'crawler_response_bytes_total{{endpoint="{endpoint}"}} {n}')
+            lines.append("# TYPE crawler_request_latency_seconds histogram")
+            for endpoint, histogram in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, n in zip(histogram.buckets, histogram.counts):
+                    cumulative += n
+                    lines.append(f'crawler_request_latency_seconds_bucket{{endpoint="{endpoint}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'crawler_request_latency_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {histogram.count}')
+                lines.append(f'crawler_request_latency_seconds_sum{{endpoint="{endpoint}"}} {histogram.sum}')
+                lines.append(f'crawler_request_latency_seconds_count{{endpoint="{endpoint}"}} {histogram.count}')
+            for (name, label), value in sorted(self.counters.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+                labels = f'{{reason="{label}"}}' if label is not None else ""
+                lines.append(f"crawler_{name}{labels} {value}")
+        for name, value in sorted(gauges.items()):
+            if value is not None:
+                lines.append(f"crawler_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_exporter(self, path=None, port=None, interval=10.0):
+        """每隔 interval 秒把快照写到 path（原子替换）；给出 port 时在 127.0.0.1 上提供 /metrics"""
+        if path:
+            def export():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.write_file(path)
+                    except OSError as e:
+                        print(f"⚠️ 写入指标文件失败: {e}")
+
+            threading.Thread(target=export, name="metrics-exporter", daemon=True).start()
+
+        if port:
+            metrics = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def log_message(self, *args):
+                    pass
+
+                def do_GET(self):
+                    if self.path.rstrip("/") not in ("", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = metrics.render_prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+
+class SampledLog:
+    """抽样打印每个仓库的结果：成功的每 every 个打印一个，失败的全部打印但每秒最多 max_failures_per_sec 条"""
+
+    def __init__(self, every=100, max_failures_per_sec=5):
+        self.every = every
+        self.max_failures_per_sec = max_failures_per_sec
+        self._lock = threading.Lock()
+        self._successes = 0
+        self._second = 0
+        self._failures_this_second = 0
+        self._suppressed = 0
+
+    def repo(self, repo_name, success, fail_reason=None):
+        with self._lock:
+            if success:
+                self._successes += 1
+                if self._successes % self.every:
+                    return
+                line = f"{repo_name}: ✅ 成功（已成功 {self._successes} 个）"
+            else:
+                second = int(time.monotonic())
+                if second != self._second:
+                    self._second, self._failures_this_second = second, 0
+                self._failures_this_second += 1
+                if self._failures_this_second > self.max_failures_per_sec:
+                    self._suppressed += 1
+                    return
+                line = f"{repo_name}: ❌ 失败 ({fail_reason})"
+                if self._suppressed:
+                    line += f"，另有 {self._suppressed} 条失败未打印"
+                    self._suppressed = 0
+        print(line)
@@ -5,10 +5,16 @@ import requests
 import os
 from tqdm import tqdm
 
+from http_cache import HttpCache
+
 CSV_FILE = "./2025-openrank-top10000.csv"
 OUTPUT_FILE = "repos_output.jsonl"
+# 保存 ETag / Last-Modified，重跑时未变化的仓库只做一次 304 校验；设为 None 时不使用缓存
+HTTP_CACHE_FILE = "http_cache.sqlite"
 
 GITHUB_TOKEN = ""
+# 对接本地 mock 服务时通过环境变量覆盖
+API_BASE = os.environ.get("GITHUB_API_BASE", "https://api.github.com")
 
 headers = {
     "Authorization": f"Bearer {GITHUB_TOKEN}",
@@ -20,12 +26,22 @@ topics_headers = {
     "Accept": "application/vnd.github.mercy-preview+json"
 }
 
-def get_repo_info(repo_full_name):
-    url = f"https://api.github.com/repos/{repo_full_name}"
-    r = requests.get(url, headers=topics_headers)
+http_cache = HttpCache(HTTP_CACHE_FILE) if HTTP_CACHE_FILE else None
+
+
+def get_json(url, headers):
+    if http_cache is not None:
+        return http_cache.get_json(url, headers)
+    r = requests.get(url, headers=headers, timeout=60)
     if r.status_code != 200:
         return None
-    data = r.json()
+    return r.json()
+
+def get_repo_info(repo_full_name):
+    url = f"{API_BASE}/repos/{repo_full_name}"
+    data = get_json(url, topics_headers)
+    if data is None:
+        return None
     return {
         "description": data.get("description"),
         "homepage_url": data.get("homepage"),
@@ -34,11 +50,10 @@ def get_repo_info(repo_full_name):
 
 
 def get_readme(repo_full_name):
-    url = f"https://api.github.com/repos/{repo_full_name}/readme"
-    r = requests.get(url, headers=headers)
-    if r.status_code != 200:
+    url = f"{API_BASE}/repos/{repo_full_name}/readme"
+    data = get_json(url, headers)
+    if data is None:
         return None
-    data = r.json()
     if "content" in data:
         try:
             readme_bytes = base64.b64decode(data["content"])
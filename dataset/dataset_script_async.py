@@ -0,0 +1,287 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import aiohttp
+from tqdm import tqdm
+
+from checkpoint_index import CompletedIndex
+from dataset_script_mulio_fail_retry import auth_headers, iter_pending, iter_jsonl, rotate_failed, write_failure
+from http_cache import HttpCache
+from readme_pipeline import decode_readme, prepare_readme
+from readme_store import ReadmeStore
+from columnar_output import ParquetSink
+from jsonl_writer import JsonlWriter
+from rate_limiter import RateLimitScheduler
+from retry_queue import is_retryable
+
+CSV_FILE = "./2025-openrank-top10000.csv"
+OUTPUT_FILE = "repos_output.jsonl"
+FAILED_FILE = "failed_repos.jsonl"
+SUCCESS_FILE = "success_repos.jsonl"
+# success_repos.jsonl 的磁盘索引，断点续爬时不再把整个文件读进内存
+SUCCESS_INDEX_FILE = "success_repos.index.sqlite"
+# 上一轮的失败列表，重试时从这里流式读取
+PREV_FAILED_FILE = "failed_repos.prev.jsonl"
+# 永久失败（仓库不存在、已转为私有等）的仓库，只追加不轮换，之后的运行不再抓取它们
+PERMANENT_FILE = "permanent_failed_repos.jsonl"
+# 保存 ETag / Last-Modified，重跑时未变化的请求只做一次不计额度的 304 校验；设为 None 关闭
+HTTP_CACHE_FILE = "http_cache.sqlite"
+# 设置为文件名时启用内容寻址的 README 库，输出记录里只保存 readme_sha256，不再包含 readme_text；
+# 默认关闭，照旧把 readme_text 写进记录，读取输出的下游程序不受影响
+README_STORE_FILE = None
+# README 的解码和清洗（生成 tagging_input）交给多少个进程；设为 0 时在事件循环里解码，不生成 tagging_input
+README_WORKERS = 2
+
+# 具体的token
+GITHUB_TOKEN = ""
+# 有多个 token 时全部列在这里，调度器会按各自的剩余额度轮换使用
+GITHUB_TOKENS = [GITHUB_TOKEN]
+# 对接本地 mock 服务时通过环境变量覆盖
+API_BASE = os.environ.get("GITHUB_API_BASE", "https://api.github.com")
+
+# 同时在途的仓库数；每个仓库的两个请求并发发出，连接池大小是它的两倍
+CONCURRENCY = 50
+RETRY_LIMIT = 3
+REQUEST_TIMEOUT = 60
+# 同一个 token 两次请求之间的最小间隔
+MIN_INTERVAL = 0.0
+# 写线程每隔多少秒 flush 一次输出文件，WRITE_FSYNC 控制是否同时 fsync
+WRITE_FLUSH_INTERVAL = 1.0
+WRITE_FSYNC = True
+# 设置为目录名时，额外把成功的结果写成 zstd 压缩的 Parquet 列式数据集（需要 pyarrow）
+COLUMNAR_OUTPUT_DIR = None
+
+ACCEPT = "application/vnd.github+json"
+TOPICS_ACCEPT = "application/vnd.github.mercy-preview+json"
+
+# 依赖上面配置的共享对象，在 setup() 中创建；导入本模块时不打开任何文件
+scheduler = None
+http_cache = None
+readme_store = None
+# 在 crawl 中创建
+readme_pool = None
+
+
+def setup(config=None):
+    """用 config（常量名 -> 值）覆盖上面的配置，再按最终的配置创建共享对象；只指定 GITHUB_TOKEN 时 GITHUB_TOKENS 随之更新"""
+    global scheduler, http_cache, readme_store
+    config = dict(config or {})
+    unknown = [name for name in config if not name.isupper() or name not in globals()]
+    if unknown:
+        raise ValueError(f"未知的配置项: {', '.join(unknown)}")
+    if "GITHUB_TOKEN" in config and "GITHUB_TOKENS" not in config:
+        config["GITHUB_TOKENS"] = [config["GITHUB_TOKEN"]]
+    globals().update(config)
+
+    scheduler = RateLimitScheduler(GITHUB_TOKENS, min_interval=MIN_INTERVAL)
+    http_cache = HttpCache(HTTP_CACHE_FILE) if HTTP_CACHE_FILE else None
+    readme_store = ReadmeStore(README_STORE_FILE) if README_STORE_FILE else None
+
+
+async def fetch_json(session, url, accept, retry=0):
+    headers = http_cache.conditional_headers(url) if http_cache is not None else {}
+    # 条件请求多半命中 304，先不占额度，拿到新内容后再记账
+    token = await scheduler.acquire_async(cost=0 if headers else 1)
+    # update() 会把 token 的在途请求数减一，每次 acquire 只能调用一次
+    released = False
+    try:
+        async with session.get(url, headers={**auth_headers(token, accept), **headers}) as r:
+            scheduler.update(token, r.headers)
+            released = True
+            if headers and r.status != 304:
+                scheduler.charge(token)
+            if r.status == 304:
+                data = http_cache.load(url)
+                return data if data is not None else {"_error": "cache_miss_304"}
+            elif r.status == 200:
+                body = await r.read()
+                if http_cache is not None:
+                    http_cache.store(url, r.headers, body)
+                return json.loads(body)
+            elif r.status == 404:
+                return {"_error": "not_found"}
+            elif r.status in (403, 429):
+                scheduler.penalize(token, r.headers, retry)
+                status = r.status
+            else:
+                return {"_error": f"status_{r.status}"}
+    except Exception as e:
+        if not released:
+            scheduler.update(token, {})
+        if retry < RETRY_LIMIT:
+            await asyncio.sleep(2 ** retry)
+            return await fetch_json(session, url, accept, retry + 1)
+        return {"_error": f"exception_{type(e).__name__}: {str(e)}"}
+    # 被限流时先退出 async with 把连接还给连接池，再等待调度器放行后重试
+    if retry < RETRY_LIMIT:
+        return await fetch_json(session, url, accept, retry + 1)
+    return {"_error": f"rate_limit_or_forbidden_{status}"}
+
+
+async def get_repo_info(session, repo_full_name):
+    url = f"{API_BASE}/repos/{repo_full_name}"
+    data = await fetch_json(session, url, TOPICS_ACCEPT)
+    if not data or "_error" in data:
+        return {"_error": data.get("_error") if data else "unknown_error"}
+    return {
+        "description": data.get("description"),
+        "homepage_url": data.get("homepage"),
+        "topics": data.get("topics", [])
+    }
+
+
+async def get_readme(session, repo_full_name):
+    url = f"{API_BASE}/repos/{repo_full_name}/readme"
+    data = await fetch_json(session, url, ACCEPT)
+    if not data:
+        return {"_error": "no_response"}
+    if "_error" in data:
+        return {"_error": data["_error"]}
+    if "content" not in data:
+        return {"_error": "no_content_field"}
+    if readme_pool is not None:
+        # 解码留给 README 处理进程，不占用事件循环
+        return {"content": data["content"]}
+    return decode_readme(data)
+
+
+def write_result(result, success_repo_ids, writer):
+    repo_id = result["repo_id"]
+    if readme_store is not None:
+        result["readme_sha256"] = readme_store.put(result.pop("readme_text"))
+    if result["success"]:
+        writer.write("output", result)
+        if repo_id not in success_repo_ids:
+            writer.write("success", {"repo_id": repo_id, "repo_name": result["repo_name"]})
+            success_repo_ids.add(repo_id)
+    else:
+        write_failure(result, writer)
+
+
+async def process_repo(session, row, success_repo_ids, writer):
+    repo_name = row["repo_name"]
+    success = True
+    fail_reason = None
+
+    # 同一仓库的两个请求并发发出
+    info, readme_data = await asyncio.gather(
+        get_repo_info(session, repo_name),
+        get_readme(session, repo_name)
+    )
+
+    if "_error" in info:
+        success = False
+        fail_reason = info["_error"]
+        info = {"description": None, "homepage_url": None, "topics": []}
+
+    tagging_input = None
+    if readme_pool is not None and success and readme_data.get("_error") in (None, "not_found"):
+        # 同时在途的仓库最多 CONCURRENCY 个，进程池的排队长度也就有了上限
+        readme_data, tagging_input = await asyncio.get_running_loop().run_in_executor(
+            readme_pool, prepare_readme, readme_data, repo_name, info["description"], info["topics"]
+        )
+    else:
+        readme_data = decode_readme(readme_data)
+
+    if "_error" in readme_data:
+        # 如果只是没有 README，不算失败
+        if readme_data["_error"] != "not_found":
+            success = False
+            fail_reason = readme_data["_error"]
+        readme_text = None
+    else:
+        readme_text = readme_data["text"]
+
+    result = {
+        "repo_id": row["repo_id"],
+        "repo_name": repo_name,
+        "total_openrank": row["total_openrank"],
+        "description": info["description"],
+        "homepage_url": info["homepage_url"],
+        "topics": info["topics"],
+        "readme_text": readme_text,
+        "success": success,
+        "fail_reason": fail_reason
+    }
+    if tagging_input is not None:
+        result["tagging_input"] = tagging_input
+    write_result(result, success_repo_ids, writer)
+    return result
+
+
+async def run_round(session, rows, success_repo_ids, writer):
+    # 所有 worker 共用一个行迭代器，按需读取，内存中只有在途的仓库
+    rows = iter(rows)
+    failed = 0
+    progress = tqdm(desc="Processing repositories")
+
+    async def worker():
+        nonlocal failed
+        for row in rows:
+            result = await process_repo(session, row, success_repo_ids, writer)
+            # 永久失败已经单独记录，不参与下一轮重试
+            if not result["success"] and is_retryable(result["fail_reason"]):
+                failed += 1
+            progress.update(1)
+
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    progress.close()
+    return failed
+
+
+async def crawl(rows, success_repo_ids, writer):
+    global readme_pool
+    if README_WORKERS:
+        readme_pool = ProcessPoolExecutor(max_workers=README_WORKERS)
+    # 整个抓取过程共用一个带 keep-alive 的连接池
+    connector = aiohttp.TCPConnector(limit=2 * CONCURRENCY, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        for round_no in range(RETRY_LIMIT + 1):
+            failed = await run_round(session, rows, success_repo_ids, writer)
+            # 本轮结果全部写完并释放句柄之后才能轮换失败列表
+            writer.flush(release=True)
+            if not failed or round_no == RETRY_LIMIT:
+                break
+            print(f"{failed} 个仓库失败，将在下一轮重试...")
+            os.replace(FAILED_FILE, PREV_FAILED_FILE)
+            rows = iter_pending(success_repo_ids, PREV_FAILED_FILE)
+            await asyncio.sleep(5)
+    if readme_pool is not None:
+        readme_pool.shutdown()
+
+
+def main(config=None):
+    """config 覆盖模块顶部的常量，例如 {"CSV_FILE": None, "CONCURRENCY": 100}；cli.py 由命令行参数生成"""
+    setup(config)
+    success_repo_ids = CompletedIndex(SUCCESS_INDEX_FILE, SUCCESS_FILE)
+    success_repo_ids.sync()
+    print(f"已完成仓库: {len(success_repo_ids)}")
+
+    # 上次运行留下的失败列表转为本次的重试输入，本次的失败写入新的 FAILED_FILE
+    rotate_failed(FAILED_FILE, PREV_FAILED_FILE)
+    permanent = {row["repo_id"] for row in iter_jsonl(PERMANENT_FILE)}
+    rows = iter_pending(success_repo_ids, PREV_FAILED_FILE, CSV_FILE, skip=permanent)
+
+    # success 放在最后：断点记录只会在对应的输出落盘之后写入
+    writer = JsonlWriter(
+        [("output", OUTPUT_FILE), ("failed", FAILED_FILE), ("permanent", PERMANENT_FILE), ("success", SUCCESS_FILE)],
+        flush_interval=WRITE_FLUSH_INTERVAL, fsync=WRITE_FSYNC,
+        sinks={"output": ParquetSink(COLUMNAR_OUTPUT_DIR)} if COLUMNAR_OUTPUT_DIR else None
+    )
+    writer.start()
+    asyncio.run(crawl(rows, success_repo_ids, writer))
+    writer.close()
+    success_repo_ids.close()
+    # 与之前一样，全部成功时留下一个空的失败列表
+    open(FAILED_FILE, "a", encoding="utf-8").close()
+    if os.path.exists(PREV_FAILED_FILE):
+        os.remove(PREV_FAILED_FILE)
+
+    print(f"✅ All done! 成功仓库写入 {OUTPUT_FILE}，失败仓库写入 {FAILED_FILE}，成功记录文件 {SUCCESS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,13 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 import threading
+import os
 
 CSV_FILE = "./2025-openrank-top10000.csv"
 OUTPUT_FILE = "repos_output.jsonl"
 GITHUB_TOKEN = ""
+# 对接本地 mock 服务时通过环境变量覆盖
+API_BASE = os.environ.get("GITHUB_API_BASE", "https://api.github.com")
 
 MAX_WORKERS = 10
 RETRY_LIMIT = 3
@@ -48,7 +51,7 @@ def fetch_json(url, headers, retry=0):
 
 
 def get_repo_info(repo_full_name):
-    url = f"https://api.github.com/repos/{repo_full_name}"
+    url = f"{API_BASE}/repos/{repo_full_name}"
     data = fetch_json(url, TOPICS_HEADERS)
     if not data:
         return None
@@ -60,7 +63,7 @@ def get_repo_info(repo_full_name):
 
 
 def get_readme(repo_full_name):
-    url = f"https://api.github.com/repos/{repo_full_name}/readme"
+    url = f"{API_BASE}/repos/{repo_full_name}/readme"
     data = fetch_json(url, HEADERS)
     if not data or "content" not in data:
         return None
@@ -1,67 +1,200 @@
 import csv
 import json
-import base64
 import requests
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 from tqdm import tqdm
-import threading
 import os
 
+import graphql_fetch
+from adaptive_concurrency import AdaptiveConcurrency, OK, ERROR, THROTTLED
+from checkpoint_index import CompletedIndex
+from crawler_metrics import CrawlerMetrics, SampledLog
+from http_cache import HttpCache
+from readme_pipeline import ReadmePipeline, decode_readme
+from readme_store import ReadmeStore
+from retry_queue import RetryQueue, is_retryable
+from columnar_output import ParquetSink
+from jsonl_writer import JsonlWriter
+from rate_limiter import RateLimitScheduler
+
 CSV_FILE = "./2025-openrank-top10000.csv"
 OUTPUT_FILE = "repos_output.jsonl"
 FAILED_FILE = "failed_repos.jsonl"
 SUCCESS_FILE = "success_repos.jsonl"
+# success_repos.jsonl 的磁盘索引，断点续爬时不再把整个文件读进内存
+SUCCESS_INDEX_FILE = "success_repos.index.sqlite"
+# 上一次运行的失败列表，本次运行时从这里流式读取
+PREV_FAILED_FILE = "failed_repos.prev.jsonl"
+# 永久失败（仓库不存在、已转为私有等）的仓库，只追加不轮换，之后的运行不再抓取它们
+PERMANENT_FILE = "permanent_failed_repos.jsonl"
+# 保存 ETag / Last-Modified，重跑时未变化的请求只做一次不计额度的 304 校验；设为 None 关闭
+HTTP_CACHE_FILE = "http_cache.sqlite"
+# 设置为文件名时启用内容寻址的 README 库，输出记录里只保存 readme_sha256，不再包含 readme_text；
+# 默认关闭，照旧把 readme_text 写进记录，读取输出的下游程序不受影响
+README_STORE_FILE = None
+# 失败记录只保留重试和排查需要的字段
+FAILED_FIELDS = ("repo_id", "repo_name", "total_openrank", "fail_reason")
+# README 的解码和清洗（生成 tagging_input）交给多少个进程；设为 0 时在抓取线程里解码，不生成 tagging_input
+README_WORKERS = 2
 
 # 具体的token
 GITHUB_TOKEN = ""
+# 有多个 token 时全部列在这里，调度器会按各自的剩余额度轮换使用
+GITHUB_TOKENS = [GITHUB_TOKEN]
+# 对接本地 mock 服务时通过环境变量覆盖
+API_BASE = os.environ.get("GITHUB_API_BASE", "https://api.github.com")
+GRAPHQL_URL = os.environ.get("GITHUB_GRAPHQL_URL", f"{API_BASE}/graphql")
+
+# "rest": 每个仓库两次 REST 请求；"graphql": 每 GRAPHQL_BATCH_SIZE 个仓库一次 GraphQL 请求
+FETCH_BACKEND = "rest"
+GRAPHQL_BATCH_SIZE = 50
 
 MAX_WORKERS = 10
+# 自适应模式：线程池开到 ADAPTIVE_MAX_WORKERS，同时在途的请求数按延迟、错误率和剩余额度自动增减（AIMD），
+# 不再需要针对 token 和网络手动调整 MAX_WORKERS 和 MIN_INTERVAL（自适应模式下 worker 不再按 MIN_INTERVAL 休眠）
+ADAPTIVE_CONCURRENCY = False
+ADAPTIVE_MAX_WORKERS = 64
+# 同时提交给线程池的任务数上限，待处理列表再长内存占用也保持不变
+MAX_IN_FLIGHT = (ADAPTIVE_MAX_WORKERS if ADAPTIVE_CONCURRENCY else MAX_WORKERS) * 2
+# 每个仓库最多重试的次数，第 n 次重试前随机等待 RETRY_BASE_DELAY * 2**n 秒的后一半（不超过 RETRY_MAX_DELAY）
 RETRY_LIMIT = 3
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 300.0
+# 每个 worker 处理完一个仓库（GraphQL 为一批）后休眠的秒数；请求速率本身按响应头里的剩余额度调度
 MIN_INTERVAL = 0.1
 
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github+json"
-}
-
-TOPICS_HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.mercy-preview+json"
-}
-
-file_lock = threading.Lock()
+# 写线程每隔多少秒 flush 一次输出文件，WRITE_FSYNC 控制是否同时 fsync
+WRITE_FLUSH_INTERVAL = 1.0
+WRITE_FSYNC = True
+# 设置为目录名时，额外把成功的结果写成 zstd 压缩的 Parquet 列式数据集（需要 pyarrow）
+COLUMNAR_OUTPUT_DIR = None
+# 每隔 METRICS_INTERVAL 秒把抓取指标（吞吐、各接口延迟分位数、重试原因、限流等待、队列长度）写入 METRICS_FILE，None 表示不写
+METRICS_FILE = "crawler_metrics.json"
+METRICS_INTERVAL = 10
+# 设置端口时在 http://127.0.0.1:METRICS_PORT/metrics 提供 Prometheus 格式的指标
+METRICS_PORT = None
+# 成功的仓库每 LOG_SAMPLE_EVERY 个打印一行，失败的都打印，但每秒最多 LOG_MAX_FAILURES_PER_SEC 行
+LOG_SAMPLE_EVERY = 100
+LOG_MAX_FAILURES_PER_SEC = 5
+
+ACCEPT = "application/vnd.github+json"
+TOPICS_ACCEPT = "application/vnd.github.mercy-preview+json"
+
+# 依赖上面配置的共享对象，在 setup() 中创建；导入本模块时不打开任何文件
+scheduler = None
+# GraphQL 的额度与 REST 分开计算
+graphql_scheduler = None
+http_cache = None
+readme_store = None
+# 在 main 中创建
+readme_pipeline = None
+concurrency = None
+metrics = CrawlerMetrics()
+repo_log = None
+
+
+def setup(config=None):
+    """用 config（常量名 -> 值）覆盖上面的配置，再按最终的配置创建共享对象
+
+    只指定 GITHUB_TOKEN、API_BASE 或并发设置时，由它们推出的 GITHUB_TOKENS、GRAPHQL_URL
+    和 MAX_IN_FLIGHT 也随之更新。
+    """
+    global scheduler, graphql_scheduler, http_cache, readme_store, concurrency, repo_log, MAX_IN_FLIGHT
+    config = dict(config or {})
+    unknown = [name for name in config if not name.isupper() or name not in globals()]
+    if unknown:
+        raise ValueError(f"未知的配置项: {', '.join(unknown)}")
+    if "GITHUB_TOKEN" in config and "GITHUB_TOKENS" not in config:
+        config["GITHUB_TOKENS"] = [config["GITHUB_TOKEN"]]
+    if "API_BASE" in config and "GRAPHQL_URL" not in config:
+        config["GRAPHQL_URL"] = f"{config['API_BASE']}/graphql"
+    globals().update(config)
+    if ({"MAX_WORKERS", "ADAPTIVE_CONCURRENCY", "ADAPTIVE_MAX_WORKERS"} & set(config)) and "MAX_IN_FLIGHT" not in config:
+        MAX_IN_FLIGHT = (ADAPTIVE_MAX_WORKERS if ADAPTIVE_CONCURRENCY else MAX_WORKERS) * 2
+
+    scheduler = RateLimitScheduler(GITHUB_TOKENS)
+    graphql_scheduler = RateLimitScheduler(GITHUB_TOKENS)
+    http_cache = HttpCache(HTTP_CACHE_FILE) if HTTP_CACHE_FILE else None
+    readme_store = ReadmeStore(README_STORE_FILE) if README_STORE_FILE else None
+    concurrency = AdaptiveConcurrency(max_limit=ADAPTIVE_MAX_WORKERS, scheduler=scheduler) if ADAPTIVE_CONCURRENCY else None
+    repo_log = SampledLog(LOG_SAMPLE_EVERY, LOG_MAX_FAILURES_PER_SEC)
+
+
+def auth_headers(token, accept):
+    return {
+        "Authorization": f"Bearer {token}",
+        "Accept": accept
+    }
 
 
-def fetch_json(url, headers, retry=0):
+def send_request(url, accept, token, headers, payload, endpoint):
+    # 自适应模式下只在真正发请求期间占用并发名额，等待额度和重试退避时不占
+    if concurrency is not None:
+        concurrency.acquire()
+    start = time.monotonic()
+    outcome = ERROR
+    status = "exception"
+    nbytes = 0
+    try:
+        if payload is None:
+            r = requests.get(url, headers={**auth_headers(token, accept), **headers}, timeout=60)
+        else:
+            r = requests.post(url, json=payload, headers=auth_headers(token, accept), timeout=60)
+        status, nbytes = r.status_code, len(r.content)
+        if r.status_code in (403, 429):
+            outcome = THROTTLED
+        elif r.status_code < 500:
+            outcome = OK
+        return r
+    finally:
+        latency = time.monotonic() - start
+        if concurrency is not None:
+            concurrency.release(latency, outcome)
+        metrics.observe_request(endpoint, latency, nbytes, status)
+
+
+def fetch_json(url, accept, payload=None, limiter=None, endpoint="repo"):
+    # 传入 payload 时以 POST 发送 JSON 请求体（GraphQL）；endpoint 是指标里区分接口的标签
+    # 只请求一次：失败的仓库由 crawl() 放进重试队列退避，不在这里 sleep 占着线程
+    limiter = limiter or scheduler
+    headers = {}
+    if payload is None and http_cache is not None:
+        headers = http_cache.conditional_headers(url)
+    # 条件请求多半命中 304，先不占额度，拿到新内容后再记账
+    token = limiter.acquire(cost=0 if headers else 1)
+    # update() 会把 token 的在途请求数减一，每次 acquire 只能调用一次
+    released = False
     try:
-        r = requests.get(url, headers=headers, timeout=60)
-        if r.status_code == 200:
+        r = send_request(url, accept, token, headers, payload, endpoint)
+        limiter.update(token, r.headers)
+        released = True
+        if headers and r.status_code != 304:
+            limiter.charge(token)
+        if r.status_code == 304:
+            data = http_cache.load(url)
+            return data if data is not None else {"_error": "cache_miss_304"}
+        elif r.status_code == 200:
+            if payload is None and http_cache is not None:
+                http_cache.store(url, r.headers, r.content)
             return r.json()
         elif r.status_code == 404:
             return {"_error": "not_found"}
         elif r.status_code in (403, 429):
-            reset = r.headers.get("X-RateLimit-Reset")
-            remaining = r.headers.get("X-RateLimit-Remaining")
-            if remaining == "0" and reset:
-                sleep_time = int(reset) - int(time.time()) + 5
-                print(f"⚠️ Rate limit reached. Sleeping {sleep_time}s ...")
-                time.sleep(max(sleep_time, 10))
-            elif retry < RETRY_LIMIT:
-                time.sleep(2 ** retry)
-                return fetch_json(url, headers, retry + 1)
+            # 暂停触发限流的 token，其他 token 上的请求不受影响
+            limiter.penalize(token, r.headers)
             return {"_error": f"rate_limit_or_forbidden_{r.status_code}"}
         else:
             return {"_error": f"status_{r.status_code}"}
     except Exception as e:
-        if retry < RETRY_LIMIT:
-            time.sleep(2 ** retry)
-            return fetch_json(url, headers, retry + 1)
+        if not released:
+            limiter.update(token, {})
         return {"_error": f"exception_{type(e).__name__}: {str(e)}"}
 
 def get_repo_info(repo_full_name):
-    url = f"https://api.github.com/repos/{repo_full_name}"
-    data = fetch_json(url, TOPICS_HEADERS)
+    url = f"{API_BASE}/repos/{repo_full_name}"
+    data = fetch_json(url, TOPICS_ACCEPT)
     if not data or "_error" in data:
         return {"_error": data.get("_error") if data else "unknown_error"}
     return {
@@ -72,47 +205,154 @@ def get_repo_info(repo_full_name):
 
 
 def get_readme(repo_full_name):
-    url = f"https://api.github.com/repos/{repo_full_name}/readme"
-    data = fetch_json(url, HEADERS)
+    url = f"{API_BASE}/repos/{repo_full_name}/readme"
+    data = fetch_json(url, ACCEPT, endpoint="readme")
     if not data:
         return {"_error": "no_response"}
     if "_error" in data:
         return {"_error": data["_error"]}
     if "content" not in data:
         return {"_error": "no_content_field"}
-    try:
-        text = base64.b64decode(data["content"]).decode("utf-8", errors="ignore")
-        return {"text": text}
-    except Exception as e:
-        return {"_error": f"decode_error_{type(e).__name__}"}
+    if readme_pipeline is not None:
+        # 解码留给 README 处理进程
+        return {"content": data["content"]}
+    return decode_readme(data)
 
 
-def load_jsonl(file_path):
+def iter_jsonl(file_path):
     if os.path.exists(file_path):
         with open(file_path, "r", encoding="utf-8") as f:
-            return [json.loads(line) for line in f if line.strip()]
-    return []
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def rotate_failed(failed_file, prev_file):
+    # prev_file 还在说明上次运行中断了，其中可能还有没处理到的仓库：把新的失败追加到后面而不是覆盖，
+    # 重复的仓库由 iter_pending 去重。prev_file 只在一次运行正常结束后删除
+    if not os.path.exists(failed_file):
+        return
+    if not os.path.exists(prev_file):
+        os.replace(failed_file, prev_file)
+        return
+    with open(failed_file, "rb") as f:
+        data = f.read()
+    # 崩溃时写了一半的最后一行丢弃
+    data = data[:data.rfind(b"\n") + 1]
+    with open(prev_file, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(failed_file)
+
+
+def iter_pending(success_index, failed_file, csv_file=None, skip=()):
+    # 先取上一轮失败的仓库，再顺序读 CSV；失败列表通常很小，只对它做内存去重
+    # skip 是永久失败的仓库，同样跳过
+    seen_failed = set(skip)
+    for row in iter_jsonl(failed_file):
+        repo_id = row["repo_id"]
+        if repo_id in seen_failed or repo_id in success_index:
+            continue
+        seen_failed.add(repo_id)
+        yield {"repo_id": repo_id, "repo_name": row["repo_name"], "total_openrank": row["total_openrank"]}
+
+    if csv_file is None:
+        return
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row["repo_id"] not in seen_failed and row["repo_id"] not in success_index:
+                yield row
+
+
+def iter_batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def pause():
+    # 与最初的多线程版本一样，每个 worker 处理完后休眠 MIN_INTERVAL；自适应模式由并发上限控制速率
+    if concurrency is None and MIN_INTERVAL:
+        time.sleep(MIN_INTERVAL)
+
+
+def process_rows(rows, success_repo_ids, writer):
+    return [process_repo(row, success_repo_ids, writer) for row in rows]
+
+
+def process_repo(row, success_repo_ids, writer):
+    info = get_repo_info(row["repo_name"])
+    readme_data = get_readme(row["repo_name"])
+    result = finish_repo(row, info, readme_data, success_repo_ids, writer)
+    pause()
+    return result
 
 
-def save_jsonl(file_path, data):
-    with open(file_path, "w", encoding="utf-8") as f:
-        for item in data:
-            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+def process_batch(rows, success_repo_ids, writer):
+    payload = fetch_json(
+        GRAPHQL_URL, ACCEPT,
+        payload={"query": graphql_fetch.build_query(rows)},
+        limiter=graphql_scheduler,
+        endpoint="graphql"
+    )
+    results = []
+    for row, (info, readme_data) in zip(rows, graphql_fetch.parse_response(rows, payload)):
+        if readme_data is None:
+            # README 不在常见文件名下，回退到 REST 的 /readme 接口
+            readme_data = get_readme(row["repo_name"])
+        results.append(finish_repo(row, info, readme_data, success_repo_ids, writer))
+    pause()
+    return results
+
+
+def failed_record(result):
+    return {key: result[key] for key in FAILED_FIELDS}
+
+
+def write_failure(result, writer):
+    # 可重试的失败写进失败列表，下次运行再试；永久失败单独记录，以后不再抓取
+    name = "failed" if is_retryable(result["fail_reason"]) else "permanent"
+    writer.write(name, failed_record(result))
+
+
+def finish_repo(row, info, readme_data, success_repo_ids, writer):
+    # 没有 README 的仓库也生成 tagging_input；其他错误的仓库直接记为失败
+    if readme_pipeline is not None and "_error" not in info and readme_data.get("_error") in (None, "not_found"):
+        # 结果在 README 处理完成后由流水线的收尾线程写出
+        readme_pipeline.submit(
+            (row, info, success_repo_ids, writer), readme_data,
+            row["repo_name"], info["description"], info["topics"]
+        )
+        return None
+    return complete_repo(row, info, readme_data, success_repo_ids, writer)
+
+
+def finish_prepared(context, readme_data, tagging_input):
+    row, info, success_repo_ids, writer = context
+    result = complete_repo(row, info, readme_data, success_repo_ids, writer, tagging_input)
+    if not result["success"]:
+        # 流水线里只会出现解码失败，属于永久失败，不再重试
+        write_failure(result, writer)
+    return result
 
 
-def process_repo(row, success_repo_ids):
+def complete_repo(row, info, readme_data, success_repo_ids, writer, tagging_input=None):
+    # 没有交给流水线的原始 README 在这里解码
+    readme_data = decode_readme(readme_data)
     repo_name = row["repo_name"]
     repo_id = row["repo_id"]
     success = True
     fail_reason = None
 
-    info = get_repo_info(repo_name)
     if "_error" in info:
         success = False
         fail_reason = info["_error"]
         info = {"description": None, "homepage_url": None, "topics": []}
 
-    readme_data = get_readme(repo_name)
     if "_error" in readme_data:
         # 如果只是没有 README，不算失败
         if readme_data["_error"] != "not_found":
@@ -133,70 +373,143 @@ def process_repo(row, success_repo_ids):
         "success": success,
         "fail_reason": fail_reason
     }
-
-    with file_lock:
-        if success:
-            with open(OUTPUT_FILE, "a", encoding="utf-8") as f_out:
-                f_out.write(json.dumps(result, ensure_ascii=False) + "\n")
-            if repo_id not in success_repo_ids:
-                with open(SUCCESS_FILE, "a", encoding="utf-8") as f_succ:
-                    f_succ.write(json.dumps({"repo_id": repo_id, "repo_name": repo_name}, ensure_ascii=False) + "\n")
-                success_repo_ids.add(repo_id)
-        else:
-            with open(FAILED_FILE, "a", encoding="utf-8") as f_fail:
-                f_fail.write(json.dumps(result, ensure_ascii=False) + "\n")
-
-    print(f"{repo_name}: {'✅ 成功' if success else '❌ 失败'} {f'({fail_reason})' if fail_reason else ''}")
-    time.sleep(MIN_INTERVAL)
+    if tagging_input is not None:
+        result["tagging_input"] = tagging_input
+    if readme_store is not None:
+        result["readme_sha256"] = readme_store.put(result.pop("readme_text"))
+
+    # 失败的仓库由调用方决定重试还是记为失败
+    if success:
+        metrics.inc("succeeded_total")
+        writer.write("output", result)
+        if repo_id not in success_repo_ids:
+            writer.write("success", {"repo_id": repo_id, "repo_name": repo_name})
+            success_repo_ids.add(repo_id)
+
+    repo_log.repo(repo_name, success, fail_reason)
     return result
 
 
-def main():
-    success_repo_records = load_jsonl(SUCCESS_FILE)
-    success_repo_ids = set(r["repo_id"] for r in success_repo_records)
-
-    with open(CSV_FILE, newline='', encoding='utf-8') as f:
-        all_rows = list(csv.DictReader(f))
-
-    pending_repos = [row for row in all_rows if row["repo_id"] not in success_repo_ids]
-
-    failed_repos = load_jsonl(FAILED_FILE)
-
-    # 合并待抓取列表，去重
-    pending_dict = {row["repo_id"]: row for row in pending_repos}
-    for row in failed_repos:
-        if row["repo_id"] not in pending_dict:
-            pending_dict[row["repo_id"]] = row
-    repos_to_process = list(pending_dict.values())
-
-    print(f"总共待处理仓库: {len(repos_to_process)}")
-
-    save_jsonl(FAILED_FILE, [])
-
-    while repos_to_process:
-        failed_next_round = []
-
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [executor.submit(process_repo, row, success_repo_ids) for row in repos_to_process]
-
-            for future in tqdm(as_completed(futures), total=len(futures), desc="Processing repositories"):
-                result = future.result()
-                if not result["success"]:
-                    failed_next_round.append({
-                        "repo_id": result["repo_id"],
-                        "repo_name": result["repo_name"],
-                        "total_openrank": result["total_openrank"]
-                    })
-
-        if failed_next_round:
-            print(f"{len(failed_next_round)} 个仓库失败，将在下一轮重试...")
-            save_jsonl(FAILED_FILE, failed_next_round)
-            repos_to_process = failed_next_round
-            time.sleep(5)
-        else:
-            break
-
-    print(f"✅ All done! 成功仓库写入 {OUTPUT_FILE}，失败仓库写入 {FAILED_FILE}，成功记录文件 {SUCCESS_FILE}")
+def crawl(executor, process, rows, batch_size, success_repo_ids, writer):
+    """新仓库和到期的重试交替提交给线程池，返回最终失败的仓库数
+
+    失败的仓库按各自的退避时间放进重试队列，期间线程继续处理新的仓库，
+    少数有问题的仓库不会拖住整个抓取。永久失败和重试次数用完的仓库写入对应的失败列表。
+    """
+    retries = RetryQueue(RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+    attempts = {}
+    fresh = iter_batches(rows, batch_size)
+    in_flight = {}
+    failed = 0
+    metrics.gauge("in_flight_batches", lambda: len(in_flight))
+    metrics.gauge("retry_queue_depth", lambda: len(retries))
+
+    def next_batch():
+        # 到期的重试优先，GraphQL 模式下同样凑成一批
+        return retries.pop_ready(batch_size) or next(fresh, None)
+
+    def collect(done):
+        nonlocal failed
+        for future in done:
+            batch = in_flight.pop(future)
+            finished = 0
+            # 交给 README 流水线的仓库返回 None，由流水线写出结果
+            for row, result in zip(batch, future.result()):
+                if result is None or result["success"]:
+                    finished += 1
+                    continue
+                repo_id = row["repo_id"]
+                attempt = attempts.get(repo_id, 0)
+                # 异常信息去掉，只按异常类型分类
+                reason = result["fail_reason"].split(":", 1)[0]
+                if is_retryable(result["fail_reason"]) and attempt < RETRY_LIMIT:
+                    attempts[repo_id] = attempt + 1
+                    retries.push(row, attempt)
+                    metrics.inc("retries_total", reason)
+                    continue
+                attempts.pop(repo_id, None)
+                metrics.inc("failed_total", reason)
+                write_failure(result, writer)
+                failed += 1
+                finished += 1
+            progress.update(finished)
+            postfix = {"retrying": len(retries)}
+            if concurrency is not None:
+                postfix["concurrency"] = concurrency.snapshot()["limit"]
+            progress.set_postfix(postfix)
+
+    with tqdm(desc="Processing repositories") as progress:
+        while True:
+            while len(in_flight) < MAX_IN_FLIGHT:
+                batch = next_batch()
+                if not batch:
+                    break
+                in_flight[executor.submit(process, batch, success_repo_ids, writer)] = batch
+            if not in_flight:
+                if not retries:
+                    break
+                # 只剩还没到期的重试
+                time.sleep(retries.next_delay())
+                continue
+            done, _ = wait(in_flight, timeout=retries.next_delay(), return_when=FIRST_COMPLETED)
+            collect(done)
+    return failed
+
+
+def main(config=None):
+    """config 覆盖模块顶部的常量，例如 {"CSV_FILE": None, "MAX_WORKERS": 20}；cli.py 由命令行参数生成"""
+    global readme_pipeline
+    setup(config)
+    success_repo_ids = CompletedIndex(SUCCESS_INDEX_FILE, SUCCESS_FILE)
+    success_repo_ids.sync()
+    print(f"已完成仓库: {len(success_repo_ids)}")
+
+    # 上次运行留下的失败列表转为本次的重试输入，本次的失败写入新的 FAILED_FILE
+    rotate_failed(FAILED_FILE, PREV_FAILED_FILE)
+    permanent = {row["repo_id"] for row in iter_jsonl(PERMANENT_FILE)}
+    rows = iter_pending(success_repo_ids, PREV_FAILED_FILE, CSV_FILE, skip=permanent)
+
+    # success 放在最后：断点记录只会在对应的输出落盘之后写入
+    writer = JsonlWriter(
+        [("output", OUTPUT_FILE), ("failed", FAILED_FILE), ("permanent", PERMANENT_FILE), ("success", SUCCESS_FILE)],
+        flush_interval=WRITE_FLUSH_INTERVAL, fsync=WRITE_FSYNC,
+        sinks={"output": ParquetSink(COLUMNAR_OUTPUT_DIR)} if COLUMNAR_OUTPUT_DIR else None
+    )
+    writer.start()
+    if README_WORKERS:
+        readme_pipeline = ReadmePipeline(finish_prepared, workers=README_WORKERS)
+
+    metrics.gauge("writer_queue_depth", writer.pending)
+    metrics.gauge("rate_limit_wait_seconds_total", lambda: scheduler.total_wait + graphql_scheduler.total_wait)
+    if readme_pipeline is not None:
+        metrics.gauge("readme_queue_depth", readme_pipeline.pending)
+    if concurrency is not None:
+        metrics.gauge("concurrency_limit", lambda: concurrency.snapshot()["limit"])
+    metrics.start_exporter(METRICS_FILE, METRICS_PORT, METRICS_INTERVAL)
+
+    if FETCH_BACKEND == "graphql":
+        batch_size, process = GRAPHQL_BATCH_SIZE, process_batch
+    else:
+        batch_size, process = 1, process_rows
+
+    workers = ADAPTIVE_MAX_WORKERS if concurrency is not None else MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        failed = crawl(executor, process, rows, batch_size, success_repo_ids, writer)
+    if readme_pipeline is not None:
+        failed += readme_pipeline.flush()
+        readme_pipeline.close()
+    writer.close()
+    success_repo_ids.close()
+    if METRICS_FILE:
+        metrics.write_file(METRICS_FILE)
+    # 与之前一样，全部成功时留下一个空的失败列表
+    open(FAILED_FILE, "a", encoding="utf-8").close()
+    if os.path.exists(PREV_FAILED_FILE):
+        os.remove(PREV_FAILED_FILE)
+    if failed:
+        print(f"{failed} 个仓库最终失败，可重试的失败会在下次运行时重新抓取")
+    print(f"✅ All done! 成功仓库写入 {OUTPUT_FILE}，失败仓库写入 {FAILED_FILE}，"
+          f"永久失败写入 {PERMANENT_FILE}，成功记录文件 {SUCCESS_FILE}")
 
 
 if __name__ == "__main__":
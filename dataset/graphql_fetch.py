@@ -0,0 +1,85 @@
+import json
+
+# GraphQL 没有 REST /readme 那样的“默认 README”字段，只能按文件名逐个尝试，
+# 都没有命中的仓库由调用方回退到 REST 接口
+README_CANDIDATES = ["README.md", "readme.md", "Readme.md", "README", "README.rst", "README.markdown", "README.txt"]
+
+REPO_FRAGMENT = """fragment RepoFields on Repository {
+  description
+  homepageUrl
+  repositoryTopics(first: 100) { nodes { topic { name } } }
+%s
+}""" % "\n".join(
+    f'  readme{i}: object(expression: "HEAD:{name}") {{ ... on Blob {{ text }} }}'
+    for i, name in enumerate(README_CANDIDATES)
+)
+
+
+def build_query(rows):
+    """把一批仓库拼成一个 GraphQL 查询，第 i 个仓库的别名为 r{i}"""
+    parts = []
+    for i, row in enumerate(rows):
+        owner, _, name = row["repo_name"].partition("/")
+        parts.append(f"  r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ ...RepoFields }}")
+    return "query {\n" + "\n".join(parts) + "\n}\n" + REPO_FRAGMENT
+
+
+def _batch_errors(payload, size):
+    # GraphQL 的错误带 path，第一段就是仓库别名，据此定位到批次中的单个仓库
+    errors = [None] * size
+    for error in payload.get("errors") or []:
+        path = error.get("path") or []
+        if not path or not str(path[0]).startswith("r"):
+            continue
+        try:
+            index = int(str(path[0])[1:])
+        except ValueError:
+            continue
+        if 0 <= index < size and errors[index] is None:
+            error_type = error.get("type")
+            errors[index] = "not_found" if error_type == "NOT_FOUND" else f"graphql_{error_type or 'error'}"
+    return errors
+
+
+def parse_response(rows, payload):
+    """按 rows 的顺序返回 (info, readme_data)，格式与 REST 的 get_repo_info / get_readme 一致
+
+    readme_data 为 None 表示仓库存在但候选文件名都没有命中，需要调用方回退到 REST。
+    """
+    if not payload or "_error" in payload:
+        reason = payload.get("_error") if payload else "no_response"
+        return [({"_error": reason}, {"_error": reason}) for _ in rows]
+
+    data = payload.get("data")
+    if not data:
+        # 整个查询失败（例如 RATE_LIMITED），批次内所有仓库都记为失败
+        error_types = sorted({e.get("type") for e in payload.get("errors") or [] if e.get("type")})
+        reason = "graphql_" + "_".join(error_types) if error_types else "graphql_error"
+        return [({"_error": reason}, {"_error": reason}) for _ in rows]
+
+    errors = _batch_errors(payload, len(rows))
+    results = []
+    for i, row in enumerate(rows):
+        repo = data.get(f"r{i}")
+        if repo is None:
+            reason = errors[i] or "not_found"
+            results.append(({"_error": reason}, {"_error": reason}))
+            continue
+
+        info = {
+            "description": repo.get("description"),
+            "homepage_url": repo.get("homepageUrl"),
+            "topics": [
+                node["topic"]["name"]
+                for node in (repo.get("repositoryTopics") or {}).get("nodes") or []
+                if node and node.get("topic")
+            ]
+        }
+        readme_data = None
+        for j in range(len(README_CANDIDATES)):
+            blob = repo.get(f"readme{j}")
+            if blob and blob.get("text") is not None:
+                readme_data = {"text": blob["text"]}
+                break
+        results.append((info, readme_data))
+    return results
@@ -0,0 +1,82 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+
+
+class HttpCache:
+    """以 URL 为键的持久化响应缓存，用于条件请求
+
+    保存每个 URL 最近一次 200 响应的 ETag / Last-Modified 和压缩后的响应体。
+    再次请求时带上 If-None-Match / If-Modified-Since，服务端返回 304 就直接用缓存内容，
+    GitHub 对 304 不扣除额度。数据库在第一次使用时才打开，多线程共用一个连接。
+    """
+
+    def __init__(self, path="http_cache.sqlite"):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, fetched_at REAL)"
+            )
+        return self._conn
+
+    def conditional_headers(self, url):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return {}
+        headers = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def load(self, url):
+        with self._lock:
+            row = self._connect().execute("SELECT body FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def store(self, url, headers, body):
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, zlib.compress(body), time.time())
+            )
+            conn.commit()
+
+    def get_json(self, url, headers, timeout=60):
+        """带条件请求的 GET，200 和 304 都返回解析后的 JSON，其余状态返回 None"""
+        r = requests.get(url, headers={**headers, **self.conditional_headers(url)}, timeout=timeout)
+        if r.status_code == 304:
+            return self.load(url)
+        if r.status_code != 200:
+            return None
+        self.store(url, r.headers, r.content)
+        return r.json()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
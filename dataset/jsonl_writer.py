@@ -0,0 +1,118 @@
+import json
+import os
+import queue
+import threading
+import time
+
+_FLUSH = object()
+_CLOSE = object()
+
+
+class JsonlWriter(threading.Thread):
+    """独占输出文件的写线程
+
+    worker 只把记录放进队列，由这个线程保持文件句柄常开、批量写入，
+    每隔 flush_interval 秒（或积累 max_batch 条记录）flush 一次，fsync=True 时同时落盘。
+    files 的顺序就是 flush 的顺序：把断点文件（success_repos.jsonl）放在最后，
+    它记录的仓库在输出文件里一定已经落盘，崩溃后断点续爬不会漏数据。
+    sinks 可以为某个文件额外挂上其他格式的输出（需要提供 write / flush / close），
+    例如 columnar_output.ParquetSink，它们同样只在这个线程里被调用。
+    """
+
+    def __init__(self, files, flush_interval=1.0, fsync=True, max_batch=1000, max_queue=10000, sinks=None):
+        super().__init__(name="jsonl-writer", daemon=True)
+        self.files = dict(files)
+        self.sinks = dict(sinks or {})
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._buffers = {name: [] for name in self.files}
+        self._handles = {}
+        self._pending = 0
+        self._error = None
+
+    def write(self, name, record):
+        if self._error is not None:
+            raise RuntimeError("写线程已退出") from self._error
+        self._queue.put((name, (json.dumps(record, ensure_ascii=False) + "\n", record if name in self.sinks else None)))
+
+    def pending(self):
+        """队列中还没写出的记录数（近似值）"""
+        return self._queue.qsize()
+
+    def flush(self, release=False):
+        """阻塞到此前放入队列的记录全部写入文件
+
+        release=True 时同时关闭文件句柄，调用方之后可以安全地重命名或替换这些文件，
+        下一次写入会重新打开。
+        """
+        done = threading.Event()
+        self._queue.put((_FLUSH, (done, release)))
+        while not done.wait(0.5):
+            if self._error is not None or not self.is_alive():
+                raise RuntimeError("写线程已退出") from self._error
+
+    def close(self):
+        self._queue.put((_CLOSE, None))
+        self.join()
+        if self._error is not None:
+            raise RuntimeError("写线程异常退出") from self._error
+
+    def _flush_buffers(self):
+        for name, lines in self._buffers.items():
+            if not lines:
+                continue
+            handle = self._handles.get(name)
+            if handle is None:
+                handle = self._handles[name] = open(self.files[name], "a", encoding="utf-8")
+            handle.write("".join(lines))
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+            lines.clear()
+        self._pending = 0
+
+    def run(self):
+        last_flush = time.monotonic()
+        try:
+            while True:
+                timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+                try:
+                    name, item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    name = None
+
+                if name is _FLUSH or name is _CLOSE:
+                    self._flush_buffers()
+                    last_flush = time.monotonic()
+                    if name is _CLOSE:
+                        break
+                    done, release = item
+                    if release:
+                        self._close_handles()
+                        for sink in self.sinks.values():
+                            sink.flush()
+                    done.set()
+                    continue
+
+                if name is not None:
+                    line, record = item
+                    self._buffers[name].append(line)
+                    self._pending += 1
+                    if record is not None:
+                        self.sinks[name].write(record)
+                if self._pending >= self.max_batch or time.monotonic() - last_flush >= self.flush_interval:
+                    self._flush_buffers()
+                    last_flush = time.monotonic()
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._close_handles()
+            for sink in self.sinks.values():
+                sink.close()
+
+    def _close_handles(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from tqdm import tqdm
+
+from rate_limiter import MinuteRateLimiter, retry_after_seconds
+from readme_pipeline import build_tagging_input, truncate_tokens
+from readme_store import ReadmeStore, readme_digest
+
+INPUT_FILE = "repos_output.jsonl"
+OUTPUT_FILE = "repo_tags.jsonl"
+# (提示词版本, 模型, 描述, README) 的哈希 -> 生成的 topics；内容没变的仓库不会重复请求
+CACHE_FILE = "llm_tag_cache.sqlite"
+# 抓取时使用了 README 库的记录只有 readme_sha256，没有 tagging_input 时从这里取正文
+README_STORE_FILE = "readme_store.sqlite"
+
+# OpenAI 兼容的 chat completions 接口；对接本地 mock 服务时通过环境变量覆盖
+LLM_API_BASE = os.environ.get("LLM_API_BASE", "https://api.openai.com/v1")
+LLM_API_KEY = os.environ.get("LLM_API_KEY", "")
+LLM_MODEL = "gpt-4o-mini"
+# 修改提示词时同时修改版本号，旧的缓存结果就不会再被使用
+PROMPT_VERSION = "v1"
+
+# 只给没有 topics 的仓库打标签
+ONLY_WITHOUT_TOPICS = True
+# 每个请求最多打包的仓库数，以及仓库部分的 token 预算（按词数 * TOKENS_PER_WORD 估算）
+REPOS_PER_PROMPT = 10
+PROMPT_TOKEN_BUDGET = 6000
+TOKENS_PER_WORD = 1.3
+MAX_TOPICS = 8
+
+MAX_WORKERS = 8
+# 接口额度：每分钟请求数和 token 数
+REQUESTS_PER_MINUTE = 500
+TOKENS_PER_MINUTE = 200000
+RETRY_LIMIT = 3
+REQUEST_TIMEOUT = 120
+
+# 每 1000 个 token 的价格（美元），用于估算费用
+PRICE_PER_1K_PROMPT = 0.00015
+PRICE_PER_1K_COMPLETION = 0.0006
+
+SYSTEM_PROMPT = (
+    "You label GitHub repositories with topics. For each repository below, return 3 to "
+    f"{MAX_TOPICS} lowercase GitHub-style topics (words joined by hyphens) describing its domain, "
+    "technology and purpose. Answer with JSON only: "
+    '{"results": [{"id": <id>, "topics": ["..."]}]}'
+)
+
+_TOPIC_CHARS = re.compile(r"[^a-z0-9-]+")
+
+limiter = MinuteRateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+
+
+def estimate_tokens(text):
+    return int(len(text.split()) * TOKENS_PER_WORD) + 1
+
+
+def normalize_topic(topic):
+    topic = _TOPIC_CHARS.sub("-", str(topic).strip().lower().replace(" ", "-"))
+    return re.sub("-{2,}", "-", topic).strip("-")[:50]
+
+
+def cache_key(record):
+    readme = record.get("readme_sha256")
+    if readme is None and record.get("readme_text"):
+        readme = readme_digest(record["readme_text"])
+    description = record.get("description") or ""
+    # 既没有描述也没有 README 时模型只能看到仓库名，仓库名也要计入键
+    name = "" if description or readme else record["repo_name"]
+    payload = json.dumps([PROMPT_VERSION, LLM_MODEL, description, readme or "", name])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TagCache:
+    """打标签结果的缓存，只在主线程中使用"""
+
+    def __init__(self, path=CACHE_FILE):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS tags (key TEXT PRIMARY KEY, topics TEXT) WITHOUT ROWID")
+
+    def get(self, key):
+        row = self._conn.execute("SELECT topics FROM tags WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, items):
+        self._conn.executemany("INSERT OR REPLACE INTO tags VALUES (?, ?)",
+                               ((key, json.dumps(topics, ensure_ascii=False)) for key, topics in items))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def load_candidates(input_file):
+    # 同一个仓库重新抓取过时以最后一条为准
+    candidates = {}
+    with open(input_file, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("success") is False:
+                continue
+            candidates.pop(record["repo_id"], None)
+            if ONLY_WITHOUT_TOPICS and record.get("topics"):
+                continue
+            candidates[record["repo_id"]] = record
+    return list(candidates.values())
+
+
+def prompt_text(record, readme_store, max_tokens):
+    """仓库在提示词里的内容：优先用抓取时生成的 tagging_input，并按每个仓库的预算截断"""
+    text = record.get("tagging_input")
+    if not text:
+        readme = record.get("readme_text")
+        if readme is None and record.get("readme_sha256") and readme_store is not None:
+            readme = readme_store.get(record["readme_sha256"])
+        text = build_tagging_input(record["repo_name"], record.get("description"), record.get("topics"), readme)
+    return truncate_tokens(text, int(max_tokens / TOKENS_PER_WORD))
+
+
+def pack_batches(items):
+    """把 (key, text) 打包成请求：每批不超过 REPOS_PER_PROMPT 个仓库和 PROMPT_TOKEN_BUDGET 个 token"""
+    batch, tokens = [], 0
+    for key, text in items:
+        cost = estimate_tokens(text)
+        if batch and (len(batch) >= REPOS_PER_PROMPT or tokens + cost > PROMPT_TOKEN_BUDGET):
+            yield batch
+            batch, tokens = [], 0
+        batch.append((key, text))
+        tokens += cost
+    if batch:
+        yield batch
+
+
+def build_messages(batch):
+    content = "\n\n".join(f"### {i}\n{text}" for i, (_, text) in enumerate(batch))
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": content}]
+
+
+def parse_tags(content, size):
+    """解析模型返回的 JSON，返回与批次一一对应的 topics 列表，缺失或格式不对的为 None"""
+    match = re.search(r"\{.*\}", content or "", re.S)
+    results = [None] * size
+    try:
+        data = json.loads(match.group(0)) if match else {}
+    except ValueError:
+        return results
+    for item in data.get("results") or []:
+        try:
+            index = int(item["id"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= index < size and isinstance(item.get("topics"), list):
+            topics = [normalize_topic(t) for t in item["topics"]]
+            results[index] = list(dict.fromkeys(t for t in topics if t))[:MAX_TOPICS]
+    return results
+
+
+def tag_batch(batch):
+    """请求一次模型，返回 (每个仓库的 topics 或 None, usage, 错误原因)"""
+    messages = build_messages(batch)
+    prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+    headers = {"Authorization": f"Bearer {LLM_API_KEY}"}
+    payload = {
+        "model": LLM_MODEL,
+        "messages": messages,
+        "temperature": 0,
+        "response_format": {"type": "json_object"}
+    }
+    reason = None
+    for retry in range(RETRY_LIMIT + 1):
+        # 按 prompt 和预计的输出长度预约 token 额度
+        limiter.acquire(prompt_tokens + len(batch) * MAX_TOPICS * 4)
+        try:
+            r = requests.post(f"{LLM_API_BASE}/chat/completions", json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
+            if r.status_code == 200:
+                data = r.json()
+                usage = data.get("usage") or {}
+                content = data["choices"][0]["message"]["content"]
+                return parse_tags(content, len(batch)), {
+                    "prompt_tokens": usage.get("prompt_tokens", prompt_tokens),
+                    "completion_tokens": usage.get("completion_tokens", estimate_tokens(content))
+                }, None
+            reason = f"status_{r.status_code}"
+            if r.status_code not in (408, 409, 429) and r.status_code < 500:
+                break
+            # Retry-After 可能是秒数，也可能是 HTTP 日期
+            delay = retry_after_seconds(r.headers.get("Retry-After"))
+            if delay is None:
+                delay = 2 ** retry
+        except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+            reason = f"exception_{type(e).__name__}"
+            delay = 2 ** retry
+        if retry < RETRY_LIMIT:
+            time.sleep(delay)
+    return [None] * len(batch), {"prompt_tokens": 0, "completion_tokens": 0}, reason
+
+
+def main():
+    input_file = sys.argv[1] if len(sys.argv) > 1 else INPUT_FILE
+    if not os.path.exists(input_file):
+        print(f"错误: 数据文件 '{input_file}' 不存在")
+        return
+
+    start = time.time()
+    records = load_candidates(input_file)
+    cache = TagCache(CACHE_FILE)
+    readme_store = ReadmeStore(README_STORE_FILE) if os.path.exists(README_STORE_FILE) else None
+
+    # 描述和 README 相同的仓库（fork、模板）共用一个缓存键，只请求一次
+    keys = [cache_key(record) for record in records]
+    tags = {}
+    pending = {}
+    for record, key in zip(records, keys):
+        if key in tags or key in pending:
+            continue
+        cached = cache.get(key)
+        if cached is not None:
+            tags[key] = cached
+        else:
+            pending[key] = prompt_text(record, readme_store, PROMPT_TOKEN_BUDGET / REPOS_PER_PROMPT)
+    cache_hits = sum(1 for key in keys if key in tags)
+    if readme_store is not None:
+        readme_store.close()
+
+    batches = list(pack_batches(pending.items()))
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(tag_batch, batch): batch for batch in batches}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Tagging repositories"):
+            batch = futures[future]
+            results, batch_usage, reason = future.result()
+            usage["prompt_tokens"] += batch_usage["prompt_tokens"]
+            usage["completion_tokens"] += batch_usage["completion_tokens"]
+            done = [(key, topics) for (key, _), topics in zip(batch, results) if topics is not None]
+            cache.put_many(done)
+            tags.update(done)
+            if len(done) < len(batch):
+                failures[reason or "invalid_response"] = failures.get(reason or "invalid_response", 0) + len(batch) - len(done)
+    cache.close()
+
+    tagged = 0
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
+        for record, key in zip(records, keys):
+            if key not in tags:
+                continue
+            tagged += 1
+            out.write(json.dumps({
+                "repo_id": record["repo_id"],
+                "repo_name": record["repo_name"],
+                "topics": tags[key],
+                "prompt_version": PROMPT_VERSION
+            }, ensure_ascii=False) + "\n")
+
+    elapsed = time.time() - start
+    cost = (usage["prompt_tokens"] * PRICE_PER_1K_PROMPT + usage["completion_tokens"] * PRICE_PER_1K_COMPLETION) / 1000
+    hit_rate = cache_hits / len(records) if records else 0.0
+    print(f"待打标签仓库: {len(records)}，缓存命中 {cache_hits}（命中率 {hit_rate:.1%}）")
+    print(f"请求 {len(batches)} 次（{len(pending)} 个不同内容），prompt tokens {usage['prompt_tokens']}，"
+          f"completion tokens {usage['completion_tokens']}，估算费用 ${cost:.4f}")
+    print(f"耗时 {elapsed:.1f}s，吞吐 {tagged / elapsed:.1f} 仓库/s，限流等待 {limiter.total_wait:.1f}s")
+    if failures:
+        print(f"❌ {sum(failures.values())} 个仓库打标签失败: {failures}，下次运行会重试")
+    print(f"✅ All done! {tagged} 个仓库的标签写入 {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# 未从响应头获知额度前，按一小时窗口估算
+DEFAULT_WINDOW = 3600
+
+
+def retry_after_seconds(value):
+    """解析 Retry-After：秒数或 HTTP 日期（RFC 7231），无法解析时返回 None"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class TokenBudget:
+    """单个 token 的额度状态，字段均由 RateLimitScheduler 在锁内维护"""
+
+    def __init__(self, token):
+        self.token = token
+        self.limit = None
+        self.remaining = None
+        self.reset = 0.0
+        self.next_at = 0.0
+        self.blocked_until = 0.0
+        self.in_flight = 0
+
+
+class RateLimitScheduler:
+    """所有抓取 worker 共享的令牌桶调度器
+
+    根据响应头中的 X-RateLimit-Remaining / X-RateLimit-Reset 跟踪每个 token 的剩余额度，
+    把剩余额度均匀摊到重置时间之前（只用 safety 比例的额度），在多个 token 之间轮换。
+    reserve() 只计算需要等待的时间，由调用方自行 sleep，因此线程和协程都可以使用。
+
+    条件请求（带 If-None-Match）命中 304 时不消耗额度，可以用 cost=0 预约，
+    只有服务端真的返回了新内容时再调用 charge() 记账。
+    """
+
+    def __init__(self, tokens, safety=0.9, min_interval=0.0):
+        if not tokens:
+            raise ValueError("至少需要一个 token")
+        self.safety = safety
+        self.min_interval = min_interval
+        self._budgets = [TokenBudget(token) for token in tokens]
+        self._by_token = {b.token: b for b in self._budgets}
+        self._lock = threading.Lock()
+        # 累计的限流等待秒数，用于观察额度是否成为瓶颈
+        self.total_wait = 0.0
+
+    def _interval(self, budget, now):
+        if budget.remaining is None:
+            return self.min_interval
+        usable = budget.remaining * self.safety
+        if usable < 1:
+            return None
+        return max(self.min_interval, (budget.reset - now) / usable)
+
+    def reserve(self, cost=1):
+        """预约一次请求，返回 (token, 需要等待的秒数)"""
+        with self._lock:
+            now = time.time()
+            best = None
+            best_start = None
+            for budget in self._budgets:
+                if budget.remaining is not None and now >= budget.reset:
+                    # 窗口已重置，在拿到新的响应头之前先按上个窗口的额度估算
+                    budget.remaining = budget.limit
+                    budget.reset = now + DEFAULT_WINDOW
+                if not cost:
+                    start = max(budget.blocked_until, now)
+                elif self._interval(budget, now) is None:
+                    start = max(budget.next_at, budget.blocked_until, budget.reset)
+                else:
+                    start = max(budget.next_at, budget.blocked_until, now)
+                if best is None or start < best_start:
+                    best, best_start = budget, start
+
+            best.in_flight += 1
+            if cost:
+                self._charge(best, best_start)
+            wait = max(0.0, best_start - now)
+            self.total_wait += wait
+            return best.token, wait
+
+    def _charge(self, budget, start):
+        interval = self._interval(budget, start)
+        if interval is None:
+            # 所有 token 都已耗尽，等待最早重置的那个
+            interval = self.min_interval
+            budget.remaining = budget.limit
+            budget.reset = start + DEFAULT_WINDOW
+        budget.next_at = max(budget.next_at, start) + interval
+        if budget.remaining is not None:
+            budget.remaining -= 1
+
+    def charge(self, token):
+        """为 cost=0 预约、但实际消耗了额度的请求补记一次"""
+        with self._lock:
+            self._charge(self._by_token[token], time.time())
+
+    def acquire(self, cost=1):
+        token, wait = self.reserve(cost)
+        if wait > 0:
+            time.sleep(wait)
+        return token
+
+    async def acquire_async(self, cost=1):
+        token, wait = self.reserve(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return token
+
+    def update(self, token, headers):
+        """用响应头校准 token 的额度"""
+        with self._lock:
+            budget = self._by_token[token]
+            budget.in_flight = max(0, budget.in_flight - 1)
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset = headers.get("X-RateLimit-Reset")
+            limit = headers.get("X-RateLimit-Limit")
+            if remaining is None or reset is None:
+                return
+            remaining, reset = int(remaining), float(reset)
+            if limit is not None:
+                budget.limit = int(limit)
+            elif budget.limit is None:
+                budget.limit = remaining + 1
+            if budget.remaining is None or reset > budget.reset:
+                # 新窗口：以服务端为准，再扣掉仍在途的请求
+                budget.remaining = remaining - budget.in_flight
+                budget.reset = reset
+            else:
+                budget.remaining = min(budget.remaining, remaining - budget.in_flight)
+
+    def block(self, token, until):
+        """触发限流后，在 until（epoch 秒）之前不再调度该 token"""
+        with self._lock:
+            budget = self._by_token[token]
+            budget.blocked_until = max(budget.blocked_until, until)
+
+    def penalize(self, token, headers, retry=0):
+        """处理 403/429：只暂停触发限流的 token，其余 token 照常调度"""
+        reset = headers.get("X-RateLimit-Reset")
+        remaining = headers.get("X-RateLimit-Remaining")
+        retry_after = retry_after_seconds(headers.get("Retry-After"))
+        if remaining == "0" and reset:
+            print(f"⚠️ Rate limit reached. Token paused for {int(reset) - int(time.time()) + 5}s ...")
+            self.block(token, int(reset) + 5)
+        elif retry_after is not None:
+            self.block(token, time.time() + retry_after)
+        else:
+            self.block(token, time.time() + 2 ** retry)
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    "remaining": b.remaining,
+                    "limit": b.limit,
+                    "reset": b.reset,
+                    "in_flight": b.in_flight
+                }
+                for b in self._budgets
+            ]
+
+
+class MinuteRateLimiter:
+    """按每分钟请求数（rpm）和每分钟 token 数（tpm）限速，LLM 接口的额度通常是这种形式
+
+    两个令牌桶都按秒匀速补充，容量为一分钟的额度。reserve() 先扣额度（允许欠账），
+    返回需要等待到额度回正的秒数，和 RateLimitScheduler 一样由调用方自行 sleep。
+    """
+
+    def __init__(self, rpm, tpm=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.total_wait = 0.0
+
+    def reserve(self, tokens=0):
+        with self._lock:
+            now = time.monotonic()
+            elapsed, self._updated = now - self._updated, now
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60) - 1
+            wait = max(0.0, -self._requests * 60 / self.rpm)
+            if self.tpm:
+                self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60) - tokens
+                wait = max(wait, -self._tokens * 60 / self.tpm)
+            self.total_wait += wait
+            return wait
+
+    def acquire(self, tokens=0):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,146 @@
+import base64
+import html
+import queue
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# 解码和清洗 README 的进程数
+README_WORKERS = 2
+# 排队等待清洗的 README 上限，队列满时抓取线程才会等待
+MAX_PENDING = 200
+# tagging_input 中 README 部分的长度上限（按空白切分的词数近似 token 数）
+TAGGING_MAX_TOKENS = 512
+
+_CODE_BLOCK = re.compile(r"```.*?(```|$)|~~~.*?(~~~|$)", re.S)
+_HTML_COMMENT = re.compile(r"<!--.*?(-->|$)", re.S)
+# 徽章通常是 [![alt](图片)](链接)，和普通图片一起整段去掉
+_BADGE = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)")
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_REFERENCE = re.compile(r"^\s*\[[^\]]+\]:\s*\S+.*$", re.M)
+_HTML_TAG = re.compile(r"<[^>]+>")
+_URL = re.compile(r"https?://\S+")
+# 表格分隔行要先于单个标记字符匹配
+_MARKUP = re.compile(r"^\s*[-=:| ]{3,}\s*$|^\s{0,3}(#{1,6}|>+|[-*+]|\d+\.)\s+|[*_`~|]+", re.M)
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_LINE_EDGES = re.compile(r" *\n *")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def decode_readme(readme_data):
+    """把 /readme 接口的 base64 内容解码成文本，已经是文本或出错时原样返回"""
+    if "content" not in readme_data:
+        return readme_data
+    try:
+        text = base64.b64decode(readme_data["content"]).decode("utf-8", errors="ignore")
+        return {"text": text}
+    except Exception as e:
+        return {"_error": f"decode_error_{type(e).__name__}"}
+
+
+def normalize_readme(text):
+    """去掉代码块、HTML、徽章、图片、链接地址和 markdown 标记，只留下正文"""
+    text = _CODE_BLOCK.sub(" ", text)
+    text = _HTML_COMMENT.sub(" ", text)
+    text = _BADGE.sub(" ", text)
+    text = _IMAGE.sub(" ", text)
+    text = _LINK.sub(r"\1", text)
+    text = _REFERENCE.sub("", text)
+    text = _HTML_TAG.sub(" ", text)
+    text = html.unescape(text)
+    text = _URL.sub(" ", text)
+    text = _MARKUP.sub(" ", text)
+    text = _LINE_EDGES.sub("\n", _SPACES.sub(" ", text))
+    return _BLANK_LINES.sub("\n", text).strip()
+
+
+def truncate_tokens(text, max_tokens):
+    words = text.split(None, max_tokens)
+    if len(words) <= max_tokens:
+        return text
+    # 保留前 max_tokens 个词（含原有换行）
+    return text[:len(text) - len(words[-1])].rstrip()
+
+
+def build_tagging_input(repo_name, description, topics, readme_text, max_tokens=TAGGING_MAX_TOKENS):
+    """LLM 打标签用的紧凑输入：仓库名、描述、topics 和清洗截断后的 README"""
+    lines = [f"repo: {repo_name}"]
+    if description:
+        lines.append(f"description: {description.strip()}")
+    if topics:
+        lines.append(f"topics: {', '.join(topics)}")
+    readme = normalize_readme(readme_text) if readme_text else ""
+    if readme:
+        lines.append(f"readme: {truncate_tokens(readme, max_tokens)}")
+    return "\n".join(lines)
+
+
+def prepare_readme(readme_data, repo_name, description, topics, max_tokens=TAGGING_MAX_TOKENS):
+    """在工作进程中执行：解码 README 并生成 tagging_input"""
+    readme_data = decode_readme(readme_data)
+    text = readme_data.get("text")
+    return readme_data, build_tagging_input(repo_name, description, topics, text, max_tokens)
+
+
+class ReadmePipeline:
+    """抓取线程之后的 README 处理阶段
+
+    抓取线程只把原始的 README 响应交给进程池，不在自己的线程里做解码和正则清洗，
+    大 README 不会因为 GIL 拖慢其他抓取线程。处理完成的结果由一个收尾线程按提交顺序
+    交给 on_done(context, readme_data, tagging_input)。submit 先占一个名额再把 README 交给进程池，
+    已提交、还没处理完的 README 不超过 max_pending 个，进程池跟不上时 submit 阻塞，内存占用有上限。
+    """
+
+    def __init__(self, on_done, workers=README_WORKERS, max_pending=MAX_PENDING, max_tokens=TAGGING_MAX_TOKENS):
+        self.on_done = on_done
+        self.max_tokens = max_tokens
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._queue = queue.Queue()
+        self._failed = 0
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="readme-pipeline", daemon=True)
+        self._thread.start()
+
+    def submit(self, context, readme_data, repo_name, description, topics):
+        if self._error is not None:
+            raise RuntimeError("README 处理线程已退出") from self._error
+        self._slots.acquire()
+        future = self._executor.submit(prepare_readme, readme_data, repo_name, description, topics, self.max_tokens)
+        self._queue.put((context, future))
+
+    def pending(self):
+        """已提交、还没交给 on_done 的 README 数"""
+        return self._queue.unfinished_tasks
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                context, future = item
+                readme_data, tagging_input = future.result()
+                result = self.on_done(context, readme_data, tagging_input)
+                if not result["success"]:
+                    self._failed += 1
+            except BaseException as e:
+                self._error = e
+            finally:
+                if item is not None:
+                    self._slots.release()
+                self._queue.task_done()
+
+    def flush(self):
+        """等待已提交的 README 全部处理完，返回这期间失败的仓库数"""
+        self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("README 处理线程异常") from self._error
+        failed, self._failed = self._failed, 0
+        return failed
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown()
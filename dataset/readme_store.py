@@ -0,0 +1,109 @@
+import hashlib
+import sqlite3
+import sys
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 压缩格式标记，写在每个 blob 的第一个字节，新旧格式可以混存
+_ZSTD = b"z"
+_ZLIB = b"d"
+ZSTD_LEVEL = 10
+
+
+def _compress(data):
+    if zstandard is not None:
+        return _ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return _ZLIB + zlib.compress(data, 9)
+
+
+def _decompress(blob):
+    codec, data = blob[:1], blob[1:]
+    if codec == _ZSTD:
+        if zstandard is None:
+            raise RuntimeError("README 库中有 zstd 压缩的内容，需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def readme_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ReadmeStore:
+    """内容寻址的 README 库：sha256(正文) -> 压缩后的正文
+
+    相同内容（fork、模板仓库、重复抓取）只存一份，抓取记录里只保存 readme_sha256。
+    安装了 zstandard 时用 zstd 压缩，否则退回 zlib。新内容写入后立即提交，
+    所以输出文件里出现的哈希在库里一定能查到；已存在的内容只做一次主键查询，不产生写入。
+    """
+
+    def __init__(self, path="readme_store.sqlite"):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS readmes (sha256 TEXT PRIMARY KEY, body BLOB) WITHOUT ROWID")
+        return self._conn
+
+    def put(self, text):
+        """保存 README 正文并返回它的哈希；没有 README（None 或空白）时返回 None"""
+        if not text or not text.strip():
+            return None
+        digest = readme_digest(text)
+        if digest in self:
+            return digest
+        body = _compress(text.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR IGNORE INTO readmes VALUES (?, ?)", (digest, body))
+            conn.commit()
+        return digest
+
+    def get(self, digest):
+        with self._lock:
+            row = self._connect().execute("SELECT body FROM readmes WHERE sha256 = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        return _decompress(row[0]).decode("utf-8")
+
+    def __contains__(self, digest):
+        with self._lock:
+            return self._connect().execute(
+                "SELECT 1 FROM readmes WHERE sha256 = ?", (digest,)
+            ).fetchone() is not None
+
+    def resolve(self, record):
+        """把只带 readme_sha256 的抓取记录还原成带 readme_text 的记录"""
+        if "readme_text" not in record and "readme_sha256" in record:
+            digest = record["readme_sha256"]
+            record["readme_text"] = self.get(digest) if digest else None
+        return record
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("用法: python readme_store.py <readme_store.sqlite> <sha256>")
+        sys.exit(1)
+    store = ReadmeStore(sys.argv[1])
+    text = store.get(sys.argv[2])
+    store.close()
+    if text is None:
+        print("❌ 找不到该 README")
+        sys.exit(1)
+    print(text)
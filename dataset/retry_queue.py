@@ -0,0 +1,54 @@
+import heapq
+import itertools
+import random
+import time
+
+# 重试也无济于事的失败原因：仓库不存在（或已转为私有）、被封禁、内容无法解码
+PERMANENT_ERRORS = {"not_found", "no_content_field", "status_410", "status_451"}
+PERMANENT_PREFIXES = ("decode_error_",)
+
+
+def is_retryable(reason):
+    """限流、超时、5xx、GraphQL 整批失败等都值得重试；仓库本身的问题则不重试"""
+    if reason in PERMANENT_ERRORS:
+        return False
+    return not reason or not reason.startswith(PERMANENT_PREFIXES)
+
+
+class RetryQueue:
+    """按到期时间排序的重试延迟队列
+
+    每个失败的仓库按自己的重试次数单独退避：第 n 次重试等待 base_delay * 2**n 秒（不超过 max_delay），
+    再取其中随机的后一半（equal jitter），避免同一时刻失败的仓库又同时重试。
+    只在调度线程里使用，不加锁。
+    """
+
+    def __init__(self, base_delay=2.0, max_delay=300.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._heap = []
+        self._seq = itertools.count()
+
+    def backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def push(self, item, attempt):
+        heapq.heappush(self._heap, (time.monotonic() + self.backoff(attempt), next(self._seq), item))
+
+    def pop_ready(self, limit):
+        """取出最多 limit 个已到期的项目"""
+        now = time.monotonic()
+        ready = []
+        while self._heap and len(ready) < limit and self._heap[0][0] <= now:
+            ready.append(heapq.heappop(self._heap)[2])
+        return ready
+
+    def next_delay(self):
+        """距离最早一项到期还有多少秒，队列为空时返回 None"""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def __len__(self):
+        return len(self._heap)